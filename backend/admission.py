@@ -0,0 +1,156 @@
+# filename: admission.py
+import asyncio, heapq, itertools, math, os, time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+
+class Overloaded(Exception):
+    """Raised when a request is refused by an AdmissionController."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(f"{reason} (retry after {retry_after}s)")
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded concurrency + bounded priority wait queue for expensive endpoints.
+
+    - At most `max_concurrent` requests run at once.
+    - Up to `max_queue` more wait, ordered by priority (0 = short query first), then arrival.
+    - A waiter that is not admitted within `queue_timeout` seconds gets a 503.
+    - When the queue is full a new request gets a 429, unless it outranks the
+      lowest-priority waiter, in which case that waiter is shed with a 503.
+
+    All bookkeeping happens on the event loop thread, so no locks are needed.
+    """
+
+    def __init__(self, name: str, max_concurrent: int = 4, max_queue: int = 16,
+                 queue_timeout: float = 20.0, short_query_chars: int = 120):
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = float(queue_timeout)
+        self.short_query_chars = int(short_query_chars)
+
+        self._in_flight = 0
+        self._waiters: List[list] = []  # heap of [priority, seq, future]
+        self._seq = itertools.count()
+
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0, "shed": 0}
+        self.peak_queue_depth = 0
+        self._wait_total = 0.0
+        self._waited = 0
+        self._service_ewma = 5.0  # seconds, refined as requests complete
+
+    # ------------------------------
+    # Public helpers
+    # ------------------------------
+    def priority_for(self, message: str) -> int:
+        """Short questions are cheap (usually a direct answer) and jump the queue."""
+        return 0 if len(message or "") <= self.short_query_chars else 1
+
+    def retry_after(self) -> int:
+        backlog = (len(self._waiters) + 1) / self.max_concurrent
+        return int(min(60, max(1, math.ceil(backlog * self._service_ewma))))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "peak_queue_depth": self.peak_queue_depth,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "avg_wait_ms": round(1000 * self._wait_total / self._waited, 2) if self._waited else 0.0,
+            "avg_service_ms": round(1000 * self._service_ewma, 2),
+        }
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 1):
+        await self.acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_ewma = 0.8 * self._service_ewma + 0.2 * (time.monotonic() - started)
+            self.release()
+
+    # ------------------------------
+    # Core queue logic
+    # ------------------------------
+    async def acquire(self, priority: int = 1) -> None:
+        if self._in_flight < self.max_concurrent and not self._waiters:
+            self._in_flight += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            victim = max(self._waiters, key=lambda w: (w[0], w[1])) if self._waiters else None
+            if victim is None or victim[0] <= priority:
+                self.rejected["queue_full"] += 1
+                raise Overloaded(429, "queue_full", self.retry_after())
+            self._discard(victim)
+            self.rejected["shed"] += 1
+            victim[2].set_exception(Overloaded(503, "shed", self.retry_after()))
+
+        fut = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), fut]
+        heapq.heappush(self._waiters, entry)
+        self.peak_queue_depth = max(self.peak_queue_depth, len(self._waiters))
+        enqueued = time.monotonic()
+
+        try:
+            await asyncio.wait_for(fut, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # release() may have granted us the slot just as the timeout fired (3.12+); pass it on.
+            self._give_back(entry, fut)
+            self.rejected["queue_timeout"] += 1
+            raise Overloaded(503, "queue_timeout", self.retry_after())
+        except asyncio.CancelledError:
+            # Client went away; hand the slot on if we had already been granted one.
+            self._give_back(entry, fut)
+            raise
+
+        self._wait_total += time.monotonic() - enqueued
+        self._waited += 1
+        self.admitted += 1
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)  # slot is handed over, in_flight stays the same
+                return
+        self._in_flight = max(0, self._in_flight - 1)
+
+    def _give_back(self, entry: list, fut: asyncio.Future) -> None:
+        if fut.done() and not fut.cancelled() and fut.exception() is None:
+            self.release()
+        else:
+            self._discard(entry)
+
+    def _discard(self, entry: list) -> None:
+        try:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        except ValueError:
+            pass
+
+
+def controller_from_env(name: str, max_concurrent: int, max_queue: int,
+                        queue_timeout: float) -> AdmissionController:
+    """Build a controller whose limits can be overridden with e.g. AGENT_MAX_CONCURRENCY."""
+    prefix = name.upper()
+    return AdmissionController(
+        name,
+        max_concurrent=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", max_concurrent)),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", max_queue)),
+        queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", queue_timeout)),
+        short_query_chars=int(os.getenv("SHORT_QUERY_CHARS", 120)),
+    )
@@ -0,0 +1,144 @@
+# filename: benchmarks/bench_logging.py
+"""
+Per-request logging overhead on the hot path.
+
+Replays the log calls one cached /agent request makes (query line, several
+flare-cache hits, Kp lookup, completion, plus the stdlib AstroPulse logger) and
+times them under each configuration, writing to a pipe drained by a reader
+thread like a terminal or container log collector would:
+
+    none     no sinks at all (cost of the calls themselves)
+    legacy   synchronous sink, no sampling, agent chain echoed to stdout (the old setup)
+    sync     synchronous sink with categories and sampling, no chain echo
+    queued   queued sink with categories and sampling (the default now)
+
+    cd backend && python benchmarks/bench_logging.py --requests 5000 --threads 1 8
+    python benchmarks/bench_logging.py --reader-delay-ms 2     # slow log consumer
+"""
+import argparse, logging, os, statistics, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import save_results, summarize
+
+from logging_config import configure_logging, get_logger, log_stats, shutdown_logging
+from loguru import logger
+
+MODES = ("none", "legacy", "sync", "queued")
+
+# Roughly what StdOutCallbackHandler printed for a 3-step ReAct run.
+CHAIN_ECHO = (
+    "\n\n> Entering new AgentExecutor chain...\n"
+    + "Thought: I should fetch recent flares and the Kp index.\nAction: FetchNASASolarFlares\n"
+      "Action Input: {\"days_back\": 7}\n" * 3
+    + "[{\"flareID\": \"2024-05-10T06:27:00-FLR-001\", \"classType\": \"X3.9\", ...}]\n" * 12
+    + "Final Answer: Elevated flare activity; moderate geomagnetic risk.\n\n> Finished chain.\n"
+)
+
+
+class PipeTarget:
+    """Text stream backed by an OS pipe whose read end is drained by a thread."""
+
+    def __init__(self, reader_delay_s: float = 0.0):
+        r, w = os.pipe()
+        self.stream = os.fdopen(w, "w")
+        self._r = r
+        self.delay = reader_delay_s
+        self.bytes = 0
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            chunk = os.read(self._r, 65536)
+            if not chunk:
+                return
+            self.bytes += len(chunk)
+            if self.delay:
+                time.sleep(self.delay)
+
+    def close(self):
+        self.stream.close()
+        self._thread.join(timeout=10)
+        os.close(self._r)
+
+
+def fake_request(i: int, echo_chain: bool, stream) -> None:
+    agent_log, cache_log, nasa_log = get_logger("agent"), get_logger("cache"), get_logger("nasa")
+    app_log = logging.getLogger("AstroPulse")
+
+    agent_log.info(f"🤔 Query: analyse the last 7 days of solar activity #{i}")
+    for _ in range(4):
+        cache_log.info("[CACHE] Using cached data 2024-05-03 → 2024-05-10\n")
+    nasa_log.info("[KPINDEX] Using Kp=5.33 from 2024-05-10 06:00:00.000")
+    agent_log.success("✅ Query completed successfully")
+    app_log.info(f"agent request {i} served")
+    if echo_chain:
+        stream.write(CHAIN_ECHO)
+        stream.flush()
+
+
+def run_mode(mode: str, requests: int, threads: int, reader_delay_s: float) -> dict:
+    target = PipeTarget(reader_delay_s)
+    if mode == "none":
+        configure_logging(force=True, enqueue=False, stream=target.stream)
+        logger.remove()
+    elif mode == "legacy":
+        configure_logging(force=True, enqueue=False, sample="", stream=target.stream)
+    else:
+        configure_logging(force=True, enqueue=mode == "queued", stream=target.stream)
+
+    def one(i):
+        start = time.perf_counter()
+        fake_request(i, mode == "legacy", target.stream)
+        return time.perf_counter() - start
+
+    for i in range(min(200, requests)):  # warm up loguru's formatting caches
+        one(i)
+    started = time.perf_counter()
+    if threads == 1:
+        latencies = [one(i) for i in range(requests)]
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            latencies = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    stats = log_stats()
+    shutdown_logging(timeout=30)
+    target.close()
+
+    result = summarize(latencies, wall)
+    result["mean_us"] = round(statistics.mean(latencies) * 1e6, 2)
+    result["bytes_written"] = target.bytes
+    result["dropped_records"] = stats["dropped"]
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    ap.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    ap.add_argument("--reader-delay-ms", type=float, default=0.0,
+                    help="pause after every 64 KiB the log consumer reads")
+    ap.add_argument("--output", help="results file (default: benchmarks/results/logging-<ts>.json)")
+    args = ap.parse_args()
+
+    results = {}
+    for threads in args.threads:
+        results[str(threads)] = {}
+        for mode in args.modes:
+            stats = run_mode(mode, args.requests, threads, args.reader_delay_ms / 1000)
+            results[str(threads)][mode] = stats
+        base = results[str(threads)].get("none", {}).get("mean_us", 0.0)
+        for mode, stats in results[str(threads)].items():
+            stats["overhead_us"] = round(stats["mean_us"] - base, 2)
+            print(f"threads={threads:<3} {mode:<7} mean={stats['mean_us']:>9}us  p99={stats['p99_ms']:>8}ms  "
+                  f"overhead={stats['overhead_us']:>9}us  bytes={stats['bytes_written']:>9}  "
+                  f"dropped={stats['dropped_records']}", file=sys.stderr)
+
+    config = {"requests": args.requests, "threads": args.threads, "reader_delay_ms": args.reader_delay_ms}
+    print(save_results("logging", {"config": config, "modes": results}, args.output))
+
+
+if __name__ == "__main__":
+    main()
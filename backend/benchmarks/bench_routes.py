@@ -0,0 +1,151 @@
+# filename: benchmarks/bench_routes.py
+"""
+Throughput and p50/p95/p99 latency for every route in main.py at increasing
+concurrency, fully offline: upstreams and the LLM are served by FakeUpstream.
+
+    cd backend && python benchmarks/bench_routes.py --concurrency 1 4 16 64
+"""
+import argparse, asyncio, contextlib, os, random, sys, time
+from collections import Counter
+
+from common import save_results, summarize
+from fake_upstream import FakeUpstream
+
+
+def fleet_catalog(n: int = 1000, seed: int = 3) -> list:
+    """Deterministic mixed LEO/MEO/GEO catalog for POST /nasa/fleet/vulnerability."""
+    rnd = random.Random(seed)
+    alts = ((300, 2000), (2000, 30000), (35700, 35900))
+    return [{"id": f"SAT-{i:05d}", "altitude_km": rnd.uniform(*rnd.choice(alts)),
+             "inclination_deg": rnd.uniform(0, 98), "shielding": rnd.choice(("light", "standard", "hardened"))}
+            for i in range(n)]
+
+
+# (name, method, path, json body, request-count multiplier)
+ROUTES = [
+    ("root", "GET", "/", None, 1.0),
+    ("kp_index", "GET", "/kp-index?days_back=1", None, 1.0),
+    ("nasa_flares", "GET", "/nasa/flares?days_back=7", None, 1.0),
+    ("nasa_analysis", "GET", "/nasa/analysis?days_back=7", None, 1.0),
+    ("nasa_impact", "GET", "/nasa/impact?flare_class=X1.8&source_location=N24W63", None, 1.0),
+    ("nasa_vulnerability", "GET", "/nasa/vulnerability?flare_class=M5.2&kp_index=6", None, 1.0),
+    ("nasa_alert", "GET", "/nasa/alert?risk_level=HIGH&flare_class=M5.2&impact_hours=36", None, 1.0),
+    ("admission", "GET", "/admission", None, 1.0),
+    ("metrics", "GET", "/metrics", None, 1.0),
+    ("startup", "GET", "/startup", None, 1.0),
+    ("flares_window", "GET", "/nasa/flares/window?start=2024-05-03T00:00Z&end=2024-05-12T00:00Z", None, 1.0),
+    ("flares_max", "GET", "/nasa/flares/max?start=2024-05-03T00:00Z&end=2024-05-12T00:00Z", None, 1.0),
+    ("flares_region", "GET", "/nasa/flares/region/13664", None, 1.0),
+    ("flares_index", "GET", "/nasa/flares/index", None, 1.0),
+    ("flares_backfill", "POST", "/nasa/flares/index/backfill?start_date=2024-04-01&end_date=2024-05-31", None, 0.1),
+    ("fleet_vulnerability", "POST", "/nasa/fleet/vulnerability",
+     {"satellites": fleet_catalog(), "flare_class": "M5.2", "kp_index": 6, "top": 50}, 0.25),
+    ("scenarios", "GET", "/nasa/scenarios", None, 1.0),
+    ("scenarios_heatmap", "GET", "/nasa/scenarios/heatmap?metric=combined_risk&x=kp&y=magnitude", None, 1.0),
+    ("chat", "POST", "/chat", {"message": "What is a coronal mass ejection?"}, 0.5),
+    ("agent_greeting", "POST", "/agent?brief=false", {"message": "hi"}, 0.25),
+    ("agent_satellite", "POST", "/agent?brief=true&trace=true",
+     {"message": "How vulnerable are our satellites to current geomagnetic conditions?"}, 0.1),
+    ("agent_full", "POST", "/agent?brief=true",
+     {"message": "Run a full 7-day solar activity analysis and issue an operational alert."}, 0.1),
+]
+
+
+def load_app(upstream: FakeUpstream, cache: bool, replay_url: str = None):
+    os.environ["GEMINI_API_KEY"] = "bench"
+    os.environ["OPENAI_API_BASE"] = upstream.url + "/v1"
+    os.environ["ENABLE_CACHE"] = "true" if cache else "false"
+    if replay_url:
+        # DONKI/SWPC come from a replay_server.py cassette; the LLM stays scripted.
+        os.environ["NASA_BASE_URL"] = replay_url + "/nasa/DONKI"
+        os.environ["SWPC_BASE_URL"] = replay_url + "/swpc"
+    else:
+        os.environ["NASA_BASE_URL"] = upstream.url + "/DONKI"
+        os.environ["SWPC_BASE_URL"] = upstream.url
+
+    import logging, main
+    logging.getLogger("AstroPulse").setLevel(logging.WARNING)
+    return main.app
+
+
+def failed(res) -> bool:
+    """Routes report errors as HTTP 200 with {"status": "error"} (or {"error": ...} for /chat)."""
+    if res.status_code >= 400:
+        return True
+    if not res.headers.get("content-type", "").startswith("application/json"):
+        return False
+    data = res.json()
+    if not isinstance(data, dict):
+        return False
+    return ("status" in data and data["status"] != "success") or ("status" not in data and "error" in data)
+
+
+async def run_level(client, method, path, body, concurrency, total):
+    latencies, statuses = [], Counter()
+    failures = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal failures
+        for _ in remaining:
+            start = time.perf_counter()
+            res = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            statuses[res.status_code] += 1
+            failures += failed(res)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, time.perf_counter() - started)
+    result["status_codes"] = {str(k): v for k, v in sorted(statuses.items())}
+    result["failures"] = failures
+    return result
+
+
+async def run(app, args):
+    import httpx
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for name, method, path, body, weight in ROUTES:
+            if args.routes and name not in args.routes:
+                continue
+            await client.request(method, path, json=body)  # warm-up
+            results[name] = {}
+            for c in args.concurrency:
+                total = max(c, int(args.requests * weight))
+                stats = await run_level(client, method, path, body, c, total)
+                results[name][str(c)] = stats
+                print(f"{name:<20} c={c:<4} {stats['throughput_rps']:>9} rps  "
+                      f"p50={stats['p50_ms']:>9}ms p95={stats['p95_ms']:>9}ms p99={stats['p99_ms']:>9}ms  "
+                      f"{stats['status_codes']} failures={stats['failures']}", file=sys.stderr)
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    ap.add_argument("--requests", type=int, default=200, help="requests per level (scaled down for LLM routes)")
+    ap.add_argument("--routes", nargs="*", help="subset of route names to run")
+    ap.add_argument("--llm-latency-ms", type=float, default=0)
+    ap.add_argument("--upstream-latency-ms", type=float, default=0)
+    ap.add_argument("--no-cache", action="store_true", help="disable the flare cache")
+    ap.add_argument("--replay-url", help="serve DONKI/SWPC from a running replay_server.py instead of fixtures")
+    ap.add_argument("--output", help="results file (default: benchmarks/results/routes-<ts>.json)")
+    args = ap.parse_args()
+
+    upstream = FakeUpstream(0, args.llm_latency_ms, args.upstream_latency_ms).start()
+    try:
+        # The backend logs (and the agent chain with ?verbose=true) write to stdout; keep it out of the numbers.
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            app = load_app(upstream, cache=not args.no_cache, replay_url=args.replay_url)
+            results = asyncio.run(run(app, args))
+    finally:
+        upstream.stop()
+
+    config = {k: v for k, v in vars(args).items() if k != "output"}
+    print(save_results("routes", {"config": config, "routes": results}, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# filename: benchmarks/bench_tools.py
+"""
+Micro-benchmarks for the pure analysis tools on large synthetic flare sets.
+
+    cd backend && python benchmarks/bench_tools.py --sizes 1000 10000 100000
+"""
+import argparse, json, os, random, statistics, sys, time
+from datetime import datetime, timedelta
+
+from common import save_results
+
+
+def synthetic_flares(n: int, seed: int = 42) -> list:
+    """n flares in the fetch_nasa_solar_flares shape, ordered by peakTime."""
+    rnd = random.Random(seed)
+    t = datetime(2022, 1, 1)
+    flares = []
+    for i in range(n):
+        t += timedelta(minutes=rnd.randint(5, 240))
+        c = rnd.choices("ABCMX", weights=[2, 8, 60, 25, 5])[0]
+        flares.append({
+            "flareID": f"{t.strftime('%Y-%m-%dT%H:%M')}:00-FLR-{i:06d}",
+            "beginTime": (t - timedelta(minutes=10)).strftime("%Y-%m-%dT%H:%MZ"),
+            "peakTime": t.strftime("%Y-%m-%dT%H:%MZ"),
+            "classType": f"{c}{rnd.uniform(1.0, 9.9):.1f}",
+            "sourceLocation": f"{rnd.choice('NS')}{rnd.randint(0, 35):02d}{rnd.choice('EW')}{rnd.randint(0, 90):02d}",
+            "activeRegionNum": rnd.randint(13000, 13900),
+        })
+    return flares
+
+
+def bench(fn, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"min_ms": round(min(times) * 1000, 3), "median_ms": round(statistics.median(times) * 1000, 3)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--output", help="results file (default: benchmarks/results/tools-<ts>.json)")
+    args = ap.parse_args()
+
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            import nasa_tools
+            from loguru import logger
+            logger.remove()
+        finally:
+            sys.stdout = stdout
+
+    results = {}
+    for n in args.sizes:
+        flares = synthetic_flares(n)
+        flares_json = json.dumps(flares)
+        pairs = [(f["classType"], f["sourceLocation"]) for f in flares]
+        kp = [i % 10 for i in range(n)]
+
+        cases = {
+            "analyze_flare_escalation[json]": lambda: nasa_tools.analyze_flare_escalation(flares_json),
+            "analyze_flare_escalation[list]": lambda: nasa_tools.analyze_flare_escalation(flares),
+            "predict_magnetosphere_impact[per-flare]":
+                lambda: [nasa_tools.predict_magnetosphere_impact(c, loc) for c, loc in pairs],
+            "calculate_satellite_vulnerability[per-flare]":
+                lambda: [nasa_tools.calculate_satellite_vulnerability(c, k) for (c, _), k in zip(pairs, kp)],
+        }
+        results[str(n)] = {}
+        for name, fn in cases.items():
+            stats = bench(fn, args.repeat)
+            stats["per_flare_us"] = round(stats["median_ms"] * 1000 / n, 3)
+            results[str(n)][name] = stats
+            print(f"n={n:<7} {name:<46} median={stats['median_ms']:>10}ms  {stats['per_flare_us']:>8}us/flare",
+                  file=sys.stderr)
+
+    print(save_results("tools", {"config": {"sizes": args.sizes, "repeat": args.repeat}, "tools": results},
+                       args.output))
+
+
+if __name__ == "__main__":
+    main()
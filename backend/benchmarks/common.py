@@ -0,0 +1,48 @@
+# filename: benchmarks/common.py
+import json, math, os, platform, sys
+from datetime import datetime
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies_s: List[float], wall_s: float) -> Dict[str, float]:
+    lat = sorted(latencies_s)
+    return {
+        "requests": len(lat),
+        "throughput_rps": round(len(lat) / wall_s, 2) if wall_s else 0.0,
+        "p50_ms": round(percentile(lat, 50) * 1000, 3),
+        "p95_ms": round(percentile(lat, 95) * 1000, 3),
+        "p99_ms": round(percentile(lat, 99) * 1000, 3),
+        "max_ms": round(lat[-1] * 1000, 3) if lat else 0.0,
+    }
+
+
+def save_results(name: str, results: Dict[str, Any], path: str = None) -> str:
+    """Write results plus machine info as JSON; returns the file path."""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{name}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json")
+    payload = {
+        "suite": name,
+        "created": datetime.utcnow().isoformat() + "Z",
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(path, "w") as fh:
+        json.dump(payload, fh, indent=2)
+    return path
@@ -0,0 +1,63 @@
+# filename: benchmarks/compare.py
+"""
+Compare two benchmark result files and flag regressions.
+
+    python benchmarks/compare.py results/routes-baseline.json results/routes-20250101-120000.json
+
+Latency fields (*_ms, *_us) regress when they grow, throughput_rps when it shrinks.
+Exits with status 1 if any metric regressed by more than --threshold percent.
+"""
+import argparse, json, sys
+from typing import Dict, Iterator, Tuple
+
+LOWER_IS_BETTER = ("_ms", "_us")
+HIGHER_IS_BETTER = ("throughput_rps",)
+
+
+def _leaves(node, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(node, dict):
+        for k, v in node.items():
+            yield from _leaves(v, f"{prefix}/{k}" if prefix else str(k))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, float(node)
+
+
+def compare(baseline: Dict, current: Dict, threshold: float):
+    base = dict(_leaves(baseline.get("results", {})))
+    rows, regressions = [], 0
+    for key, value in _leaves(current.get("results", {})):
+        metric = key.rsplit("/", 1)[-1]
+        if key not in base or not metric.endswith(LOWER_IS_BETTER + HIGHER_IS_BETTER) or base[key] == 0:
+            continue
+        change = (value - base[key]) / base[key] * 100
+        worse = change > threshold if metric.endswith(LOWER_IS_BETTER) else change < -threshold
+        regressions += worse
+        rows.append((key, base[key], value, change, worse))
+    return rows, regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("baseline")
+    ap.add_argument("current")
+    ap.add_argument("--threshold", type=float, default=10.0, help="allowed change in percent")
+    ap.add_argument("--only-regressions", action="store_true")
+    args = ap.parse_args()
+
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    with open(args.current) as fh:
+        current = json.load(fh)
+
+    rows, regressions = compare(baseline, current, args.threshold)
+    for key, old, new, change, worse in rows:
+        if args.only_regressions and not worse:
+            continue
+        flag = "REGRESSION" if worse else ""
+        print(f"{key:<70} {old:>12.3f} -> {new:>12.3f}  {change:+7.1f}%  {flag}")
+    print(f"\n{regressions} regression(s) beyond {args.threshold}% across {len(rows)} metrics")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
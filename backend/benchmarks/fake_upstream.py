@@ -0,0 +1,209 @@
+# filename: benchmarks/fake_upstream.py
+"""
+Local stand-in for every upstream the backend talks to, used by the benchmarks:
+
+- /DONKI/FLR                        -> fixtures/donki_flr.json
+- /json/planetary_k_index_1d.json   -> fixtures/swpc_kp_1d.json
+- /json/planetary_k_index_1m.json   -> fixtures/swpc_kp_1m.json
+- /v1/chat/completions              -> deterministic fake OpenAI-compatible LLM
+
+The fake LLM plays scripted ReAct traces: the script is picked from the user
+question and the step is the number of observations already in the scratchpad,
+so the same question always produces the same tool-calling sequence.
+
+StandInServer/StandInHandler and llm_reply() are shared with replay_server.py.
+"""
+import json, os, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SCRATCHPAD_MARKER = "Current reasoning log(Do not repeat this in your answer):\n"
+LAST_OBSERVATION = object()
+
+# (tool name, action input) pairs; LAST_OBSERVATION passes the previous tool output through.
+SCRIPTS = {
+    "greeting": [],
+    "satellite": [
+        ("FetchNASA_KpIndex", "1"),
+        ("CalculateSatelliteVulnerability", '{"flare_class": "M5.2", "kp_index": 6}'),
+    ],
+    "full": [
+        ("FetchNASASolarFlares", "7"),
+        ("AnalyzeFlareEscalation", LAST_OBSERVATION),
+        ("PredictMagnetosphereImpact", '{"flare_class": "M5.2", "source_location": "N10W30"}'),
+        ("FetchNASA_KpIndex", "1"),
+        ("CalculateSatelliteVulnerability", '{"flare_class": "M5.2", "kp_index": 6}'),
+        ("GenerateOperationalAlert", '{"risk_level": "HIGH", "flare_class": "M5.2", "impact_hours": 48}'),
+    ],
+}
+
+FINAL_ANSWER = (
+    "Solar activity over the last 7 days is escalating with repeated M-class flares. "
+    "The strongest event is M5.2 from a geo-effective western location; a Kp of ~6 is expected "
+    "in roughly two days, so LEO/MEO operators should increase monitoring."
+)
+
+
+def _load(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as fh:
+        return fh.read()
+
+
+def pick_script(question: str) -> str:
+    q = question.strip().lower()
+    if q in ("hi", "hey", "hello", "bye") or q.startswith(("hi ", "hello ")):
+        return "greeting"
+    if "satellite" in q:
+        return "satellite"
+    return "full"
+
+
+def fake_completion(prompt: str) -> str:
+    """Next ReAct turn for a given agent prompt (or a plain reply for non-agent prompts)."""
+    if SCRATCHPAD_MARKER not in prompt:
+        if prompt.startswith("Summarize the following"):
+            return "Activity is escalating with an M5.2 peak; risk is HIGH and an Earth impact is likely within ~2 days."
+        return "A coronal mass ejection is a large expulsion of plasma and magnetic field from the Sun's corona."
+
+    question = prompt.split("User Question: ", 1)[1].split("\n", 1)[0]
+    scratchpad = prompt.split(SCRATCHPAD_MARKER, 1)[1]
+    step = scratchpad.count("\nObservation: ")
+    script = SCRIPTS[pick_script(question)]
+
+    if step >= len(script):
+        return f"Thought: I now know the final answer.\nFinal Answer: {FINAL_ANSWER}"
+
+    tool, tool_input = script[step]
+    if tool_input is LAST_OBSERVATION:
+        tool_input = scratchpad.rsplit("\nObservation: ", 1)[-1].rsplit("\nThought: ", 1)[0].strip()
+    return f"Thought: I should call {tool}.\nAction: {tool}\nAction Input: {tool_input}"
+
+
+def sse_chunks(text: str, model: str, usage: dict = None, pieces: int = 4) -> bytes:
+    """`text` as an OpenAI chat.completion.chunk event stream, optionally ending with a usage chunk."""
+    def event(choices, **extra):
+        chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                 "model": model, "choices": choices, **extra}
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    size = max(1, -(-len(text) // pieces))
+    events = [event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])]
+    events += [event([{"index": 0, "delta": {"content": text[i:i + size]}, "finish_reason": None}])
+               for i in range(0, len(text), size)]
+    events.append(event([{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+    if usage is not None:
+        events.append(event([], usage=usage))
+    events.append("data: [DONE]\n\n")
+    return "".join(events).encode()
+
+
+def llm_reply(payload: dict) -> Tuple[bytes, str]:
+    """(body, content type) answering an OpenAI chat/completions request; SSE when payload["stream"]."""
+    prompt = next((m.get("content", "") for m in reversed(payload.get("messages", []))
+                   if m.get("role") == "user"), "")
+    text = fake_completion(prompt)
+    prompt_tokens, completion_tokens = len(prompt) // 4, len(text) // 4
+    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+             "total_tokens": prompt_tokens + completion_tokens}
+    if payload.get("stream"):
+        # The ReAct executor streams (ChatOpenAI.stream), so answer with SSE chunks like the real API.
+        include_usage = (payload.get("stream_options") or {}).get("include_usage")
+        return sse_chunks(text, payload.get("model", "fake"), usage if include_usage else None), "text/event-stream"
+    return json.dumps({
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model", "fake"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": usage,
+    }).encode(), "application/json"
+
+
+# ==============================
+# Server plumbing shared with replay_server.py
+# ==============================
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: bytes, status: int = 200, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, handler):
+        super().__init__(("127.0.0.1", port), handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+# ==============================
+# Fixture + fake LLM server
+# ==============================
+class _Handler(StandInHandler):
+    server: "FakeUpstream"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        body = self.server.routes.get(path)
+        if body is None:
+            return self._send(b'{"error": "not found"}', 404)
+        if self.server.upstream_latency:
+            time.sleep(self.server.upstream_latency)
+        self._send(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send(b'{"error": "not found"}', 404)
+
+        body, content_type = llm_reply(payload)
+        if self.server.llm_latency:
+            time.sleep(self.server.llm_latency)
+        self._send(body, content_type=content_type)
+
+
+class FakeUpstream(StandInServer):
+    def __init__(self, port: int = 0, llm_latency_ms: float = 0, upstream_latency_ms: float = 0):
+        super().__init__(port, _Handler)
+        self.llm_latency = llm_latency_ms / 1000
+        self.upstream_latency = upstream_latency_ms / 1000
+        self.routes = {
+            "/DONKI/FLR": _load("donki_flr.json"),
+            "/json/planetary_k_index_1d.json": _load("swpc_kp_1d.json"),
+            "/json/planetary_k_index_1m.json": _load("swpc_kp_1m.json"),
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Serve benchmark fixtures and a fake LLM.")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--llm-latency-ms", type=float, default=0)
+    ap.add_argument("--upstream-latency-ms", type=float, default=0)
+    args = ap.parse_args()
+    server = FakeUpstream(args.port, args.llm_latency_ms, args.upstream_latency_ms)
+    print(f"Fake upstream listening on {server.url}")
+    server.serve_forever()
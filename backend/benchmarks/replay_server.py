@@ -0,0 +1,256 @@
+# filename: benchmarks/replay_server.py
+"""
+Record/replay stand-in for NASA DONKI, NOAA SWPC and the Gemini OpenAI endpoint.
+
+Each upstream is mounted under a prefix:
+
+    /nasa/...  -> https://api.nasa.gov/...
+    /swpc/...  -> https://services.swpc.noaa.gov/...
+    /llm/...   -> https://generativelanguage.googleapis.com/v1beta/openai/...
+
+Point the backend at it with:
+
+    NASA_BASE_URL=http://127.0.0.1:8766/nasa/DONKI
+    SWPC_BASE_URL=http://127.0.0.1:8766/swpc
+    OPENAI_API_BASE=http://127.0.0.1:8766/llm
+
+Record real traffic once (needs network + keys), then replay it anywhere
+(run from backend/):
+
+    python benchmarks/replay_server.py --mode record --cassette cassettes/default
+    python benchmarks/replay_server.py --mode replay --cassette cassettes/default \\
+        --latency-ms 150 llm=900 --jitter-ms 50 --error-rate nasa=0.1 --timeout-rate 0.02
+
+Fault options take a default value and/or per-upstream `name=value` overrides.
+--fake-llm answers /llm with fake_upstream's scripted ReAct LLM (JSON or SSE)
+instead of the cassette. GET /__replay/stats reports hits, misses and injected faults.
+"""
+import argparse, hashlib, json, os, random, threading, time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+import requests
+
+from fake_upstream import StandInHandler, StandInServer, llm_reply
+
+UPSTREAMS = {
+    "nasa": "https://api.nasa.gov",
+    "swpc": "https://services.swpc.noaa.gov",
+    "llm": "https://generativelanguage.googleapis.com/v1beta/openai",
+}
+# Never written to a cassette, and ignored when matching.
+SECRET_PARAMS = {"api_key"}
+# Date windows move every day; requests still match a recording made on another day.
+VOLATILE_PARAMS = {"startDate", "endDate"}
+
+
+def _normalize_query(query: str, drop=SECRET_PARAMS) -> str:
+    return urlencode(sorted((k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in drop))
+
+
+def _body_digest(body: bytes) -> str:
+    if not body:
+        return ""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True).encode()
+    except ValueError:
+        pass
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+def request_key(method: str, path: str, query: str, body: bytes) -> str:
+    return f"{method} {path}?{_normalize_query(query)} {_body_digest(body)}"
+
+
+def loose_key(method: str, path: str, query: str) -> str:
+    return f"{method} {path}?{_normalize_query(query, SECRET_PARAMS | VOLATILE_PARAMS)}"
+
+
+class Cassette:
+    """Directory of recorded interactions, one JSON file each."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.exact: Dict[str, dict] = {}
+        self.loose: Dict[str, List[dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".json"):
+                with open(os.path.join(path, name)) as fh:
+                    self._index(json.load(fh))
+
+    def _index(self, entry: dict) -> None:
+        self.exact[entry["key"]] = entry
+        self.loose.setdefault(entry["loose_key"], []).append(entry)
+
+    def find(self, key: str, loose: Optional[str]) -> Optional[dict]:
+        entry = self.exact.get(key)
+        if entry is not None or loose is None:
+            return entry
+        candidates = self.loose.get(loose)
+        if not candidates:
+            return None
+        # No exact match (e.g. a different LLM prompt): cycle through what was recorded for this endpoint.
+        with self._lock:
+            i = self._cursor.get(loose, 0)
+            self._cursor[loose] = i + 1
+        return candidates[i % len(candidates)]
+
+    def save(self, entry: dict) -> None:
+        digest = hashlib.sha256(entry["key"].encode()).hexdigest()[:20]
+        with open(os.path.join(self.path, f"{digest}.json"), "w") as fh:
+            json.dump(entry, fh, indent=1)
+        with self._lock:
+            self._index(entry)
+
+
+class Faults:
+    """Per-upstream latency/error/timeout injection, seeded for reproducible runs."""
+
+    def __init__(self, latency_ms, jitter_ms, error_rate, timeout_rate, timeout_s: float, seed: int):
+        self.latency_ms, self.jitter_ms = latency_ms, jitter_ms
+        self.error_rate, self.timeout_rate = error_rate, timeout_rate
+        self.timeout_s = timeout_s
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get(table: Dict[str, float], upstream: str) -> float:
+        return table.get(upstream, table.get("*", 0.0))
+
+    def decide(self, upstream: str) -> Tuple[float, Optional[str]]:
+        """Returns (delay seconds, fault) where fault is None, 'error' or 'timeout'."""
+        with self._lock:
+            roll = self._rnd.random()
+            jitter = self._rnd.uniform(-1, 1) * self._get(self.jitter_ms, upstream)
+        delay = max(0.0, self._get(self.latency_ms, upstream) + jitter) / 1000
+        timeout_rate = self._get(self.timeout_rate, upstream)
+        if roll < timeout_rate:
+            return self.timeout_s, "timeout"
+        if roll < timeout_rate + self._get(self.error_rate, upstream):
+            return delay, "error"
+        return delay, None
+
+
+class _Handler(StandInHandler):
+    server: "ReplayServer"
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method: str):
+        path, _, query = self.path.partition("?")
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+
+        if path == "/__replay/stats":
+            return self._send(json.dumps(self.server.stats_snapshot()).encode())
+
+        upstream, _, rest = path.lstrip("/").partition("/")
+        if upstream not in UPSTREAMS:
+            return self._send(b'{"error": "unknown upstream prefix"}', 404)
+
+        delay, fault = self.server.faults.decide(upstream)
+        if delay:
+            time.sleep(delay)
+        if fault == "timeout":
+            self.server.count("timeouts")
+            self.close_connection = True
+            return
+        if fault == "error":
+            self.server.count("errors")
+            return self._send(b'{"error": "injected upstream failure"}', 503)
+
+        if upstream == "llm" and self.server.fake_llm:
+            self.server.count("hits")
+            reply, content_type = llm_reply(json.loads(body or b"{}"))
+            return self._send(reply, content_type=content_type)
+
+        key = request_key(method, path, query, body)
+        if self.server.mode == "record":
+            return self._record(method, upstream, rest, path, query, body, key)
+
+        entry = self.server.cassette.find(key, None if self.server.strict else loose_key(method, path, query))
+        if entry is None:
+            self.server.count("misses")
+            return self._send(json.dumps({"error": "no recording", "key": key}).encode(), 502)
+        self.server.count("hits")
+        res = entry["response"]
+        self._send(res["body"].encode(), res["status"], res.get("content_type", "application/json"))
+
+    def _record(self, method, upstream, rest, path, query, body, key):
+        url = f"{UPSTREAMS[upstream]}/{rest}" + (f"?{query}" if query else "")
+        headers = {k: v for k, v in self.headers.items() if k.lower() in ("authorization", "content-type", "accept")}
+        try:
+            res = requests.request(method, url, data=body or None, headers=headers, timeout=60)
+        except requests.RequestException as e:
+            self.server.count("errors")
+            return self._send(json.dumps({"error": str(e)}).encode(), 502)
+
+        content_type = res.headers.get("Content-Type", "application/json")
+        if res.status_code < 500:
+            self.server.cassette.save({
+                "key": key,
+                "loose_key": loose_key(method, path, query),
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "request": {"method": method, "path": path, "query": _normalize_query(query)},
+                "response": {"status": res.status_code, "content_type": content_type, "body": res.text},
+            })
+            self.server.count("recorded")
+        self._send(res.content, res.status_code, content_type)
+
+
+class ReplayServer(StandInServer):
+    def __init__(self, cassette: str, mode: str = "replay", port: int = 8766, strict: bool = False,
+                 faults: Optional[Faults] = None, fake_llm: bool = False):
+        super().__init__(port, _Handler)
+        self.cassette = Cassette(cassette)
+        self.mode = mode
+        self.strict = strict
+        self.fake_llm = fake_llm
+        self.faults = faults or Faults({}, {}, {}, {}, 30.0, 0)
+        self._stats = {"hits": 0, "misses": 0, "recorded": 0, "errors": 0, "timeouts": 0}
+        self._stats_lock = threading.Lock()
+
+    def count(self, field: str) -> None:
+        with self._stats_lock:
+            self._stats[field] += 1
+
+    def stats_snapshot(self) -> dict:
+        with self._stats_lock:
+            return {"mode": self.mode, "recordings": len(self.cassette.exact), **self._stats}
+
+
+def _per_upstream(values: List[str]) -> Dict[str, float]:
+    """['150', 'llm=900'] -> {'*': 150.0, 'llm': 900.0}"""
+    table = {}
+    for v in values or []:
+        name, _, num = v.rpartition("=")
+        table[name or "*"] = float(num)
+    return table
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mode", choices=["record", "replay"], default="replay")
+    ap.add_argument("--cassette", default=os.getenv("REPLAY_CASSETTE", "cassettes/default"))
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--strict", action="store_true", help="only serve exact request matches")
+    ap.add_argument("--latency-ms", nargs="*", default=[])
+    ap.add_argument("--jitter-ms", nargs="*", default=[])
+    ap.add_argument("--error-rate", nargs="*", default=[])
+    ap.add_argument("--timeout-rate", nargs="*", default=[])
+    ap.add_argument("--timeout-s", type=float, default=30.0, help="how long an injected timeout hangs")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--fake-llm", action="store_true", help="serve /llm from the scripted fake LLM")
+    args = ap.parse_args()
+
+    faults = Faults(_per_upstream(args.latency_ms), _per_upstream(args.jitter_ms), _per_upstream(args.error_rate),
+                    _per_upstream(args.timeout_rate), args.timeout_s, args.seed)
+    server = ReplayServer(args.cassette, args.mode, args.port, args.strict, faults, args.fake_llm)
+    print(f"Replay server ({args.mode}) on {server.url}, cassette={args.cassette}")
+    server.serve_forever()
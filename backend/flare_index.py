@@ -0,0 +1,329 @@
+# filename: flare_index.py
+"""
+In-memory flare event store indexed by peak time and active region.
+
+Records are compact __slots__ objects kept sorted by peakTime, so a time window is
+two bisects; each active region keeps its own sorted time list; and a sparse table
+over intensities answers "strongest flare between t0 and t1" in O(1).
+"""
+import calendar, json, os, threading, time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from logging_config import get_logger
+from metrics import instrument_tool
+from nasa_tools import download_flares, fetch_nasa_solar_flares, flare_intensity
+
+DEFAULT_DAYS = 30
+BACKFILL_CHUNK_DAYS = 30
+# One backfill call spans at most this many days (~37 DONKI requests); load longer histories in steps.
+MAX_BACKFILL_DAYS = int(os.getenv("FLARE_INDEX_MAX_BACKFILL_DAYS", "1100"))
+# Requests re-check the cached DONKI window at most this often (seconds).
+REFRESH_INTERVAL = float(os.getenv("FLARE_INDEX_REFRESH", "60"))
+
+logger = get_logger("index")
+
+
+def _to_ts(value: str) -> Optional[float]:
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%dT%H:%MZ", "%Y-%m-%dT%H:%M:%SZ"):
+        try:
+            return float(calendar.timegm(time.strptime(value, fmt)))
+        except ValueError:
+            pass
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return float(calendar.timegm(dt.utctimetuple()))
+    except ValueError:
+        return None
+
+
+class FlareRecord:
+    __slots__ = ("flare_id", "peak_ts", "begin_time", "peak_time", "class_type", "source_location",
+                 "region", "intensity")
+
+    def __init__(self, flare: Dict[str, Any], peak_ts: float):
+        self.flare_id = flare.get("flareID") or flare.get("flrID", "Unknown")
+        self.peak_ts = peak_ts
+        self.begin_time = flare.get("beginTime", "")
+        self.peak_time = flare.get("peakTime", "")
+        self.class_type = flare.get("classType", "Unknown")
+        self.source_location = flare.get("sourceLocation", "Unknown")
+        self.region = int(flare.get("activeRegionNum") or 0)
+        self.intensity = float(flare_intensity(self.class_type))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "flareID": self.flare_id,
+            "beginTime": self.begin_time,
+            "peakTime": self.peak_time,
+            "classType": self.class_type,
+            "sourceLocation": self.source_location,
+            "activeRegionNum": self.region,
+        }
+
+
+class FlareIndex:
+    def __init__(self):
+        self._times: List[float] = []
+        self._records: List[FlareRecord] = []
+        self._ids = set()
+        self._regions: Dict[int, tuple] = {}  # region -> (sorted times, records in the same order)
+        self._sparse: Optional[List[List[int]]] = None
+        self._lock = threading.RLock()
+        self.covered_since: Optional[float] = None
+        self._last_payload_hash: Dict[int, int] = {}
+        self._last_refresh: Dict[int, float] = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    # ------------------------------
+    # Ingestion
+    # ------------------------------
+    def add_many(self, flares: Iterable[Dict[str, Any]]) -> int:
+        new = {}
+        for f in flares:
+            fid = f.get("flareID") or f.get("flrID")
+            if not fid or fid == "FALLBACK" or fid in self._ids or fid in new:
+                continue
+            ts = _to_ts(f.get("peakTime", ""))
+            if ts is not None:
+                new[fid] = FlareRecord(f, ts)
+        if not new:
+            return 0
+
+        with self._lock:
+            new = sorted((r for r in new.values() if r.flare_id not in self._ids), key=lambda r: r.peak_ts)
+            if not new:
+                return 0
+            old_n = len(self._records)
+            if not self._times or new[0].peak_ts >= self._times[-1]:
+                # Newest flares only (the usual refresh): append and extend the sparse table in place.
+                for r in new:
+                    self._times.append(r.peak_ts)
+                    self._records.append(r)
+                    times, recs = self._regions.setdefault(r.region, ([], []))
+                    times.append(r.peak_ts)
+                    recs.append(r)
+                self._ids.update(r.flare_id for r in new)
+                self._extend_sparse(old_n)
+                return len(new)
+            if len(new) > 32:
+                # Bulk load: one sort instead of many O(n) inserts.
+                self._records = sorted(self._records + new, key=lambda r: r.peak_ts)
+                self._times = [r.peak_ts for r in self._records]
+                self._regions = {}
+                for r in self._records:
+                    times, recs = self._regions.setdefault(r.region, ([], []))
+                    times.append(r.peak_ts)
+                    recs.append(r)
+            else:
+                for r in new:
+                    i = bisect_right(self._times, r.peak_ts)
+                    self._times.insert(i, r.peak_ts)
+                    self._records.insert(i, r)
+                    times, recs = self._regions.setdefault(r.region, ([], []))
+                    j = bisect_right(times, r.peak_ts)
+                    times.insert(j, r.peak_ts)
+                    recs.insert(j, r)
+            self._ids.update(r.flare_id for r in new)
+            # Rebuilt on ingestion (rare) so max queries stay O(1) on the request path.
+            self._build_sparse()
+        return len(new)
+
+    def ensure_recent(self, days_back: int = DEFAULT_DAYS) -> None:
+        """Merge the (cached) DONKI window for the last `days_back` days, skipping unchanged payloads.
+
+        At most once per REFRESH_INTERVAL for a window this wide, so most queries skip the fetch.
+        """
+        # Routes run in the threadpool: check and stamp under the lock, fetch outside it.
+        with self._lock:
+            now = time.monotonic()
+            if any(d >= days_back and now - t < REFRESH_INTERVAL for d, t in self._last_refresh.items()):
+                return
+            self._last_refresh[days_back] = now
+        payload = fetch_nasa_solar_flares(days_back)
+        digest = hash(payload)
+        with self._lock:
+            if self._last_payload_hash.get(days_back) == digest:
+                return
+        self.add_many(json.loads(payload))
+        since = time.time() - days_back * 86400
+        with self._lock:
+            self._last_payload_hash[days_back] = digest
+            self.covered_since = since if self.covered_since is None else min(self.covered_since, since)
+
+    def backfill(self, start: datetime, end: datetime) -> int:
+        """Load a long (multi-year) history from DONKI in BACKFILL_CHUNK_DAYS requests.
+
+        Chunks are fetched newest first and covered_since only moves back over chunks
+        that loaded, so a failed request leaves the reported coverage accurate.
+        """
+        if start > end:
+            raise ValueError("start_date must not be after end_date")
+        if (end - start).days > MAX_BACKFILL_DAYS:
+            raise ValueError(f"backfill at most {MAX_BACKFILL_DAYS} days per request")
+        added = 0
+        cursor = end
+        while cursor >= start:
+            chunk_start = max(cursor - timedelta(days=BACKFILL_CHUNK_DAYS), start)
+            flares = json.loads(download_flares(chunk_start.strftime("%Y-%m-%d"), cursor.strftime("%Y-%m-%d")))
+            added += self.add_many(flares)
+            with self._lock:
+                ts = float(calendar.timegm(chunk_start.utctimetuple()))
+                self.covered_since = ts if self.covered_since is None else min(self.covered_since, ts)
+            cursor = chunk_start - timedelta(days=1)
+        logger.info(f"[INDEX] Backfilled {added} flares {start:%Y-%m-%d} → {end:%Y-%m-%d}")
+        return added
+
+    # ------------------------------
+    # Queries
+    # ------------------------------
+    def window(self, start_ts: float, end_ts: float) -> List[FlareRecord]:
+        with self._lock:
+            return self._records[bisect_left(self._times, start_ts):bisect_right(self._times, end_ts)]
+
+    def by_region(self, region: int, start_ts: float = float("-inf"), end_ts: float = float("inf")) -> List[FlareRecord]:
+        with self._lock:
+            entry = self._regions.get(int(region))
+            if entry is None:
+                return []
+            times, recs = entry
+            return recs[bisect_left(times, start_ts):bisect_right(times, end_ts)]
+
+    def max_in_window(self, start_ts: float, end_ts: float) -> Optional[FlareRecord]:
+        with self._lock:
+            lo, hi = bisect_left(self._times, start_ts), bisect_right(self._times, end_ts) - 1
+            if lo > hi:
+                return None
+            if self._sparse is None:
+                self._build_sparse()
+            k = (hi - lo + 1).bit_length() - 1
+            a, b = self._sparse[k][lo], self._sparse[k][hi - (1 << k) + 1]
+            return self._records[a] if self._records[a].intensity >= self._records[b].intensity else self._records[b]
+
+    def _extend_sparse(self, old_n: int) -> None:
+        """Add the sparse-table entries for records appended after index `old_n`: O(m log n)."""
+        if self._sparse is None or old_n == 0:
+            self._build_sparse()
+            return
+        recs, n, table = self._records, len(self._records), self._sparse
+        table[0].extend(range(old_n, n))
+        k = 1
+        while (1 << k) <= n:
+            if k == len(table):
+                table.append([])
+            prev, row, half = table[k - 1], table[k], 1 << (k - 1)
+            for i in range(len(row), n - (1 << k) + 1):
+                a, b = prev[i], prev[i + half]
+                row.append(a if recs[a].intensity >= recs[b].intensity else b)
+            k += 1
+
+    def _build_sparse(self) -> None:
+        """Sparse table of argmax(intensity) over power-of-two ranges: O(n log n) build, O(1) query."""
+        vals = [r.intensity for r in self._records]
+        table = [list(range(len(vals)))]
+        k = 1
+        while (1 << k) <= len(vals):
+            prev, half = table[-1], 1 << (k - 1)
+            table.append([prev[i] if vals[prev[i]] >= vals[prev[i + half]] else prev[i + half]
+                          for i in range(len(vals) - (1 << k) + 1)])
+            k += 1
+        self._sparse = table
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "flares": len(self._records),
+                "regions": len(self._regions),
+                "first_peak": self._records[0].peak_time if self._records else None,
+                "last_peak": self._records[-1].peak_time if self._records else None,
+                "covered_since": datetime.utcfromtimestamp(self.covered_since).isoformat() + "Z"
+                if self.covered_since else None,
+            }
+
+
+FLARE_INDEX = FlareIndex()
+
+
+def window_bounds(hours: Optional[float] = None, start: Optional[str] = None, end: Optional[str] = None):
+    """(start_ts, end_ts) from either an ISO start/end pair or a trailing `hours` window."""
+    end_ts = _to_ts(end) if end else time.time()
+    if start:
+        start_ts = _to_ts(start)
+    else:
+        start_ts = end_ts - float(hours if hours is not None else 24) * 3600
+    if start_ts is None or end_ts is None:
+        raise ValueError("start/end must be ISO timestamps, e.g. 2024-05-10T06:00Z")
+    return start_ts, end_ts
+
+
+def open_bounds(start: Optional[str] = None, end: Optional[str] = None):
+    """(start_ts, end_ts) for an optional ISO start/end filter; a missing side is unbounded."""
+    start_ts = _to_ts(start) if start else float("-inf")
+    end_ts = _to_ts(end) if end else float("inf")
+    if start_ts is None or end_ts is None:
+        raise ValueError("start/end must be ISO timestamps, e.g. 2024-05-10T06:00Z")
+    return start_ts, end_ts
+
+
+def days_needed(start_ts: float) -> int:
+    return max(1, min(DEFAULT_DAYS, int((time.time() - start_ts) // 86400) + 1))
+
+
+# ==============================
+# Agent tools
+# ==============================
+def _tool_arg(value, key: str, default):
+    """Agent tool inputs arrive as plain values, JSON strings or dicts."""
+    if isinstance(value, dict):
+        return value.get(key, default)
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+            if isinstance(parsed, dict):
+                return parsed.get(key, default)
+            return parsed
+        except Exception:
+            return value.strip().strip("'\"") or default
+    return default if value is None else value
+
+
+@instrument_tool
+def query_flares_by_region(region) -> str:
+    """All indexed flares from one NOAA active region (last 30 days unless backfilled)."""
+    try:
+        region = int(_tool_arg(region, "region", 0))
+        FLARE_INDEX.ensure_recent(DEFAULT_DAYS)
+        flares = FLARE_INDEX.by_region(region)
+        strongest = max(flares, key=lambda r: r.intensity) if flares else None
+        return json.dumps({
+            "region": region,
+            "count": len(flares),
+            "strongest": strongest.to_dict() if strongest else None,
+            "flares": [r.to_dict() for r in flares],
+        }, indent=2)
+    except Exception as e:
+        logger.error(f"[INDEX ERROR] {e}\n")
+        return json.dumps({"error": str(e)})
+
+
+@instrument_tool
+def max_flare_in_window(hours="24") -> str:
+    """Strongest flare whose peak falls within the last `hours` hours."""
+    try:
+        hours = float(_tool_arg(hours, "hours", 24))
+        start_ts, end_ts = window_bounds(hours)
+        FLARE_INDEX.ensure_recent(days_needed(start_ts))
+        record = FLARE_INDEX.max_in_window(start_ts, end_ts)
+        return json.dumps({
+            "hours": hours,
+            "count": len(FLARE_INDEX.window(start_ts, end_ts)),
+            "max_flare": record.to_dict() if record else None,
+        }, indent=2)
+    except Exception as e:
+        logger.error(f"[INDEX ERROR] {e}\n")
+        return json.dumps({"error": str(e)})
@@ -0,0 +1,89 @@
+# filename: fleet.py
+"""
+Per-satellite vulnerability scoring for a whole fleet.
+
+calculate_satellite_vulnerability() only reports generic LEO/MEO/GEO buckets; this
+scores every asset in a catalog (altitude, inclination, shielding class) against
+the current flare and Kp conditions. All maths is done on NumPy arrays in-process:
+scoring 300k satellites takes tens of milliseconds, less than pickling them to a
+process pool would, and most of a request is spent building the arrays.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from nasa_tools import flare_intensity, vulnerability_severity
+
+SHIELDING = {"light": 1.3, "standard": 1.0, "hardened": 0.6}
+SEVERITY_LEVEL = {"LOW": 0, "MODERATE": 1, "HIGH": 2, "SEVERE": 3}
+RISK_LABELS = np.array(["LOW", "MODERATE", "HIGH", "SEVERE"])
+REGIME_LABELS = np.array(["LEO", "MEO", "GEO"])
+DRIVERS = np.array(["atmospheric_drag", "radiation", "surface_charging", "polar_exposure"])
+
+
+def _score_arrays(alt: np.ndarray, inc: np.ndarray, shield: np.ndarray,
+                  kp: float, intensity: float, severity_level: int):
+    """Per-satellite score (0-100) and index of the dominant driver."""
+    kp_n = min(max(kp, 0.0), 9.0) / 9.0
+    # C1 -> 0, M1 -> 0.5, X1 -> 1: solar energetic particle load grows with log intensity.
+    sep = float(np.clip(np.log10(max(intensity, 1.0)) / 2.0, 0.0, 1.0))
+
+    # Drag only matters low in the thermosphere, and scales with geomagnetic heating.
+    drag = kp_n * np.clip((2000.0 - alt) / 1600.0, 0.0, 1.0)
+    # Inner (~3,000 km) and outer (~20,000 km) Van Allen belts, enhanced by particle events.
+    belts = np.maximum(np.exp(-((alt - 3000.0) / 2000.0) ** 2), 0.8 * np.exp(-((alt - 20000.0) / 8000.0) ** 2))
+    radiation = belts * (0.4 + 0.6 * max(sep, kp_n))
+    # Substorm injections charge spacecraft surfaces from the outer MEO range out to GEO.
+    charging = kp_n * np.clip((alt - 20000.0) / 15786.0, 0.0, 1.0)
+    # High-inclination LEO crosses the auroral ovals and the polar caps open to SEPs.
+    polar = np.clip((inc - 50.0) / 40.0, 0.0, 1.0) * (alt < 2000.0) * (0.5 * kp_n + 0.5 * sep)
+
+    drivers = np.stack([drag, radiation, charging, polar])
+    env = np.clip(drivers.sum(axis=0), 0.0, 1.0)
+    score = np.clip((0.3 * severity_level / 3.0 + 0.7 * env) * shield, 0.0, 1.0) * 100.0
+    return score, drivers.argmax(axis=0)
+
+
+def catalog_arrays(satellites: List[Dict[str, Any]]):
+    n = len(satellites)
+    alt = np.fromiter((s.get("altitude_km", 0.0) for s in satellites), dtype=np.float64, count=n)
+    inc = np.fromiter((s.get("inclination_deg", 0.0) for s in satellites), dtype=np.float64, count=n)
+    shield = np.fromiter((SHIELDING.get(str(s.get("shielding", "standard")).lower(), 1.0) for s in satellites),
+                         dtype=np.float64, count=n)
+    return alt, inc, shield
+
+
+def score_fleet(satellites: List[Dict[str, Any]], flare_class: str, kp_index: float,
+                top: Optional[int] = 100) -> Dict[str, Any]:
+    """Score and rank every satellite; returns the `top` highest-risk assets plus fleet totals."""
+    alt, inc, shield = catalog_arrays(satellites)
+    severity = vulnerability_severity(flare_class, kp_index)
+    score, driver = _score_arrays(alt, inc, shield, float(kp_index), float(flare_intensity(flare_class)),
+                                  SEVERITY_LEVEL[severity])
+    n = len(satellites)
+
+    risk = np.digitize(score, (25.0, 50.0, 75.0))
+    regime = np.digitize(alt, (2000.0, 35000.0))
+    order = np.argsort(-score, kind="stable")
+    if top is not None:
+        order = order[:top]
+
+    counts = np.bincount(risk, minlength=4)
+    results = [
+        {
+            "rank": rank + 1,
+            "id": satellites[i].get("id", str(i)),
+            "regime": str(REGIME_LABELS[regime[i]]),
+            "score": round(float(score[i]), 1),
+            "risk": str(RISK_LABELS[risk[i]]),
+            "primary_driver": str(DRIVERS[driver[i]]),
+        }
+        for rank, i in enumerate(order.tolist())
+    ]
+    return {
+        "conditions": {"flare_class": flare_class, "kp_index": kp_index, "overall_severity": severity},
+        "count": n,
+        "risk_counts": {str(label): int(c) for label, c in zip(RISK_LABELS, counts)},
+        "mean_score": round(float(score.mean()), 1) if n else 0.0,
+        "results": results,
+    }
@@ -0,0 +1,94 @@
+# filename: llm_callbacks.py
+# Kept apart from solar_agent.py so the /chat LLM can be built without importing the agent stack.
+import time
+from typing import Any, Dict, List, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+from metrics import LLM_SECONDS, LLM_TOKENS
+
+
+def _token_usage(response) -> Tuple[int, int]:
+    """(prompt, completion) tokens. Streamed calls (the agent's) have no llm_output, only usage_metadata."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            meta = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt += meta.get("input_tokens", 0)
+            completion += meta.get("output_tokens", 0)
+    return prompt, completion
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """Records latency and prompt/completion token counts for every LLM call."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._starts: Dict[Any, float] = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            LLM_SECONDS.observe(time.perf_counter() - start, model=self.model_name)
+        prompt, completion = _token_usage(response)
+        if prompt or completion:
+            LLM_TOKENS.observe(prompt, model=self.model_name, type="prompt")
+            LLM_TOKENS.observe(completion, model=self.model_name, type="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            LLM_SECONDS.observe(time.perf_counter() - start, model=self.model_name)
+
+
+class StepTimingHandler(BaseCallbackHandler):
+    """
+    Per-query wall-clock timings for LLM decisions and tool executions.
+
+    The ReAct executor runs strictly sequentially (LLM, tool, LLM, tool, ..., LLM),
+    so the i-th LLM call is the decision for step i and the extra one is the final answer.
+    """
+
+    def __init__(self):
+        self.llm_durations: List[float] = []
+        self.tool_durations: List[float] = []
+        self._starts: Dict[Any, float] = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, self.llm_durations)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, self.llm_durations)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id, self.tool_durations)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, self.tool_durations)
+
+    def _finish(self, run_id, bucket: List[float]):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            bucket.append(round((time.perf_counter() - start) * 1000, 2))
+
+    def step(self, i: int) -> Dict[str, Any]:
+        return {
+            "llm_ms": self.llm_durations[i] if i < len(self.llm_durations) else None,
+            "tool_ms": self.tool_durations[i] if i < len(self.tool_durations) else None,
+        }
@@ -0,0 +1,234 @@
+# filename: logging_config.py
+"""
+Process-wide loguru setup shared by nasa_tools, solar_agent and main.
+
+Records are formatted on the calling thread and pushed onto a bounded queue; a
+single background thread writes them out in batches, so a slow terminal or pipe
+never stalls a request. When the queue is full new records are dropped and
+counted rather than blocking. Configured from the environment:
+
+    LOG_LEVEL        default minimum level (INFO)
+    LOG_LEVELS       per-category levels, e.g. "cache=WARNING,agent=DEBUG"
+    LOG_SAMPLE       keep 1 in N records below WARNING per category, e.g. "cache=20"
+    LOG_FORMAT       text (default) or json (one serialized record per line)
+    LOG_QUEUE_SIZE   records buffered before dropping (10000)
+    LOG_ASYNC        0 to write synchronously from the caller (debugging)
+
+Modules log through get_logger("<category>"), which checks the category level
+and sample before loguru builds a record, so dropped records cost almost nothing.
+stdlib loggers (main.py's "AstroPulse") are routed into the same pipeline under
+their lowercased name; LOG_LEVELS applies to them too, LOG_SAMPLE does not.
+"""
+import atexit, itertools, logging, os, queue, sys, threading
+from typing import Dict, Optional
+
+from loguru import logger
+
+TEXT_FORMAT = "<green>[{time:HH:mm:ss}]</green> {message}"
+DEFAULT_CATEGORY = "app"
+DEFAULT_SAMPLE = "cache=20"
+_WARNING_NO = 30
+
+_configured = False
+_sink: Optional["QueueSink"] = None
+_filter: Optional["CategoryFilter"] = None
+
+
+def _parse_pairs(spec: str) -> Dict[str, str]:
+    pairs = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            if key.strip() and value.strip():
+                pairs[key.strip().lower()] = value.strip()
+    return pairs
+
+
+class QueueSink:
+    """loguru sink that enqueues formatted messages; a daemon thread writes them in batches."""
+
+    def __init__(self, stream, maxsize: int = 10000, batch: int = 256):
+        self.stream = stream
+        self.batch = batch
+        self.queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize)
+        self.written = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="astropulse-log", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message) -> None:
+        try:
+            self.queue.put_nowait(str(message))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            lines = [self.queue.get()]
+            try:
+                while len(lines) < self.batch:
+                    lines.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            stop = None in lines
+            lines = [line for line in lines if line is not None]
+            if lines:
+                try:
+                    self.stream.write("".join(lines))
+                    self.stream.flush()
+                except Exception:
+                    self.dropped += len(lines)
+                else:
+                    self.written += len(lines)
+            if stop:
+                return
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Flush everything queued so far and stop the writer thread."""
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self.queue.qsize(), "written": self.written, "dropped": self.dropped}
+
+
+class CategoryFilter:
+    """Per-category minimum level, plus 1-in-N sampling for chatty categories."""
+
+    def __init__(self, default_level: str, levels: Dict[str, str], sample: Dict[str, int]):
+        self.default = logger.level(default_level.upper()).no
+        self.levels = {c: logger.level(lvl.upper()).no for c, lvl in levels.items()}
+        self.sample = {c: n for c, n in sample.items() if n > 1}
+        self._counters = {c: itertools.count() for c in self.sample}
+
+    @property
+    def min_level(self) -> int:
+        return min([self.default, *self.levels.values()])
+
+    def enabled(self, category: str, level: int) -> bool:
+        """Level check plus sampling; called by CategoryLogger before a record exists."""
+        if level < self.levels.get(category, self.default):
+            return False
+        every = self.sample.get(category)
+        return not (every and level < _WARNING_NO and next(self._counters[category]) % every)
+
+    def __call__(self, record) -> bool:
+        """loguru handler filter: level only (records from get_logger() were already sampled)."""
+        return record["level"].no >= self.levels.get(record["extra"].get("category", DEFAULT_CATEGORY),
+                                                        self.default)
+
+
+class CategoryLogger:
+    """What get_logger() returns: loguru's level methods, gated by the category's level and sample."""
+
+    __slots__ = ("category", "_log")
+
+    def __init__(self, category: str):
+        self.category = category
+        self._log = logger.bind(category=category).opt(depth=1)
+
+    def _enabled(self, level: int) -> bool:
+        return _filter is None or _filter.enabled(self.category, level)
+
+    def debug(self, message, *args, **kwargs):
+        if self._enabled(10):
+            self._log.debug(message, *args, **kwargs)
+
+    def info(self, message, *args, **kwargs):
+        if self._enabled(20):
+            self._log.info(message, *args, **kwargs)
+
+    def success(self, message, *args, **kwargs):
+        if self._enabled(25):
+            self._log.success(message, *args, **kwargs)
+
+    def warning(self, message, *args, **kwargs):
+        if self._enabled(30):
+            self._log.warning(message, *args, **kwargs)
+
+    def error(self, message, *args, **kwargs):
+        if self._enabled(40):
+            self._log.error(message, *args, **kwargs)
+
+    def exception(self, message, *args, **kwargs):
+        if self._enabled(40):
+            self._log.exception(message, *args, **kwargs)
+
+    def critical(self, message, *args, **kwargs):
+        if self._enabled(50):
+            self._log.critical(message, *args, **kwargs)
+
+
+class InterceptHandler(logging.Handler):
+    """Forward stdlib logging records into loguru."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        logger.bind(category=record.name.lower()).opt(exception=record.exc_info).log(level, record.getMessage())
+
+
+def configure_logging(level: Optional[str] = None, *, levels: Optional[str] = None, sample: Optional[str] = None,
+                      fmt: Optional[str] = None, enqueue: Optional[bool] = None, stream=None,
+                      force: bool = False) -> None:
+    """Install the loguru sink once per process, whichever module is imported first.
+
+    Arguments override the matching LOG_* environment variables; `force` reconfigures.
+    """
+    global _configured, _sink, _filter
+    if _configured and not force:
+        return
+
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    levels = _parse_pairs(os.getenv("LOG_LEVELS", "") if levels is None else levels)
+    sample = {c: int(n) for c, n in _parse_pairs(os.getenv("LOG_SAMPLE", DEFAULT_SAMPLE) if sample is None
+                                                  else sample).items()}
+    fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+    if enqueue is None:
+        enqueue = os.getenv("LOG_ASYNC", "1") != "0"
+    stream = stream or sys.stdout
+
+    record_filter = CategoryFilter(level, levels, sample)
+    _filter = record_filter
+    logger.remove()
+    if _sink is not None:
+        _sink.stop()
+        _sink = None
+    if enqueue:
+        _sink = QueueSink(stream, maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        sink = _sink
+    else:
+        sink = stream
+    logger.add(
+        sink,
+        level=record_filter.min_level,
+        filter=record_filter,
+        format=TEXT_FORMAT,
+        serialize=fmt == "json",
+        colorize=bool(getattr(stream, "isatty", lambda: False)()) and fmt != "json",
+    )
+    logging.basicConfig(handlers=[InterceptHandler()], level=record_filter.min_level, force=True)
+    _configured = True
+
+
+def get_logger(category: str) -> CategoryLogger:
+    """Logger tagged with `category` for LOG_LEVELS / LOG_SAMPLE."""
+    return CategoryLogger(category)
+
+
+def log_stats() -> Dict[str, int]:
+    return _sink.stats() if _sink is not None else {"queued": 0, "written": 0, "dropped": 0}
+
+
+@atexit.register
+def shutdown_logging(timeout: float = 2.0) -> None:
+    """Remove the sink and flush whatever is still queued; configure_logging() can run again after."""
+    global _configured, _sink
+    logger.remove()
+    if _sink is not None:
+        _sink.stop(timeout)
+        _sink = None
+    _configured = False
@@ -1,19 +1,34 @@
 # filename: main.py
-from fastapi import FastAPI, Query
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from solar_agent import SolarAnalystAgent
-from nasa_tools import (
-    fetch_nasa_solar_flares,
-    analyze_flare_escalation,
-    predict_magnetosphere_impact,
-    calculate_satellite_vulnerability,
-    generate_operational_alert,
-    fetch_nasa_kp_index
-)
-import os, json, logging
+import startup
+
+with startup.phase("import:fastapi"):
+    from fastapi import FastAPI, Query
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse, PlainTextResponse
+    from pydantic import BaseModel, Field
+    from typing import List, Optional
+    from dotenv import load_dotenv
+with startup.phase("import:backend"):
+    from admission import Overloaded, controller_from_env
+    from logging_config import configure_logging, log_stats
+    import metrics
+    from profiling import SamplingProfiler
+with startup.phase("import:nasa_tools"):
+    from nasa_tools import (
+        fetch_nasa_solar_flares,
+        predict_magnetosphere_impact,
+        calculate_satellite_vulnerability,
+        generate_operational_alert,
+        fetch_nasa_kp_index,
+        cached_flare_analysis,
+        flare_intensity,
+    )
+    from shared_store import get_store
+    import snapshot
+import os, json, time, logging, threading
+# LangChain, the LLM client and the agent are imported/built on first use (see get_llm/get_agent),
+# so workers that only serve /nasa/* never pay for them.
 
 # ==============================
 # Environment and logging setup
@@ -21,13 +36,10 @@ import os, json, logging
 load_dotenv()
 
 os.environ["OPENAI_API_KEY"] = os.getenv("GEMINI_API_KEY", "")
-os.environ["OPENAI_API_BASE"] = "https://generativelanguage.googleapis.com/v1beta/openai/"
+os.environ.setdefault("OPENAI_API_BASE", "https://generativelanguage.googleapis.com/v1beta/openai/")
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(asctime)s] [%(levelname)s] %(message)s",
-    handlers=[logging.StreamHandler()]
-)
+# stdlib logging is routed into the queued loguru pipeline (see logging_config.py).
+configure_logging()
 logger = logging.getLogger("AstroPulse")
 
 # ==============================
@@ -42,15 +54,144 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
 
 # ==============================
 # Core Models
 # ==============================
 class UserMessage(BaseModel):
     message: str
+    session_id: Optional[str] = Field(None, description="Agent conversation to continue (default: shared)")
+
+class Satellite(BaseModel):
+    id: str
+    altitude_km: float
+    inclination_deg: float = 0.0
+    shielding: str = "standard"  # light | standard | hardened
+
+class FleetRequest(BaseModel):
+    satellites: List[Satellite]
+    flare_class: Optional[str] = None  # defaults to the strongest flare of the last 24h
+    kp_index: Optional[float] = None   # defaults to the latest NOAA Kp
+    top: Optional[int] = Field(100, ge=1)
+
+MODEL_NAME = "gemini-2.5-flash"
+_llm = None
+_solar_agent = None
+_init_lock = threading.Lock()
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        with _init_lock:
+            if _llm is None:
+                with startup.phase("import:langchain_openai"):
+                    from langchain_openai import ChatOpenAI
+                    from llm_callbacks import LLMMetricsHandler
+                with startup.phase("init:llm"):
+                    _llm = ChatOpenAI(model=MODEL_NAME, stream_usage=True,
+                                      callbacks=[LLMMetricsHandler(MODEL_NAME)])
+    return _llm
+
+def get_agent():
+    global _solar_agent
+    if _solar_agent is None:
+        with _init_lock:
+            if _solar_agent is None:
+                with startup.phase("import:solar_agent"):
+                    from solar_agent import SolarAnalystAgent
+                with startup.phase("init:agent"):
+                    _solar_agent = SolarAnalystAgent(model_name=MODEL_NAME)
+    return _solar_agent
 
-llm = ChatOpenAI(model="gemini-2.5-flash")
-solar_agent = SolarAnalystAgent(model_name="gemini-2.5-flash", verbose=True)
+def warmup(target: str = "agent") -> None:
+    """Build the lazy components ahead of the first request ("llm", "agent" or "all", which adds the scenario grid)."""
+    if target in ("llm", "all"):
+        get_llm()
+    if target in ("agent", "all"):
+        get_agent()
+    if target == "all":
+        import scenarios
+        with startup.phase("init:scenario_grid"):
+            scenarios.scenario_grid()
+    logger.info(startup.summary_line())
+
+_snapshots = None
+
+@app.on_event("startup")
+def _startup_hook():
+    global _snapshots
+    if os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true":
+        # Warm caches from the last snapshot, then keep it fresh in the background.
+        try:
+            with startup.phase("init:snapshot_load"):
+                stats = snapshot.load_snapshot(get_store())
+            logger.info(f"Cache snapshot: {stats}")
+        except Exception as e:
+            logger.warning(f"Cache snapshot not loaded: {e}")
+        _snapshots = snapshot.SnapshotScheduler(
+            get_store(), interval=float(os.getenv("SNAPSHOT_INTERVAL", "300"))).start()
+
+    target = os.getenv("ASTROPULSE_WARMUP", "").lower()
+    if target in ("llm", "agent", "all"):
+        # Off the event loop: the worker starts accepting /nasa/* traffic immediately.
+        threading.Thread(target=warmup, args=(target,), name="astropulse-warmup", daemon=True).start()
+    logger.info(startup.summary_line())
+
+@app.on_event("shutdown")
+def _shutdown_hook():
+    if _snapshots is not None:
+        _snapshots.stop()
+        try:
+            logger.info(f"Cache snapshot saved: {snapshot.save_snapshot(get_store())}")
+        except Exception as e:
+            logger.warning(f"Cache snapshot not saved: {e}")
+
+@app.get("/startup")
+def startup_report():
+    return startup.report()
+
+# ==============================
+# Admission control
+# ==============================
+# One /agent request can fan out into ~15 LLM calls, so it gets a much tighter budget than /chat.
+agent_gate = controller_from_env("agent", max_concurrent=4, max_queue=16, queue_timeout=20)
+chat_gate = controller_from_env("chat", max_concurrent=8, max_queue=32, queue_timeout=10)
+
+def _overloaded_response(e: Overloaded) -> JSONResponse:
+    logger.warning(f"Load shed: {e.reason} (retry after {e.retry_after}s)")
+    return JSONResponse(
+        status_code=e.status_code,
+        content={"status": "overloaded", "error": e.reason, "retry_after": e.retry_after},
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+@app.get("/admission")
+def admission_stats():
+    return {"agent": agent_gate.stats(), "chat": chat_gate.stats()}
+
+def _gate_samples(field):
+    return [({"gate": g.name}, g.stats()[field]) for g in (agent_gate, chat_gate)]
+
+metrics.REGISTRY.register(metrics.CallbackMetric(
+    "astropulse_admission_in_flight", "Requests currently executing.", "gauge",
+    lambda: _gate_samples("in_flight")))
+metrics.REGISTRY.register(metrics.CallbackMetric(
+    "astropulse_admission_queue_depth", "Requests waiting for admission.", "gauge",
+    lambda: _gate_samples("queue_depth")))
+metrics.REGISTRY.register(metrics.CallbackMetric(
+    "astropulse_admission_rejected_total", "Requests refused by admission control.", "counter",
+    lambda: [({"gate": g.name, "reason": r}, n) for g in (agent_gate, chat_gate) for r, n in g.rejected.items()]))
+metrics.REGISTRY.register(metrics.CallbackMetric(
+    "astropulse_log_records_total", "Log records written or dropped by the queued sink.", "counter",
+    lambda: [({"result": k}, v) for k, v in log_stats().items() if k != "queued"]))
+
+# ==============================
+# Metrics Endpoint
+# ==============================
+@app.get("/metrics")
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # ==============================
 # Chat Endpoint (Direct Gemini)
@@ -58,8 +199,11 @@ solar_agent = SolarAnalystAgent(model_name="gemini-2.5-flash", verbose=True)
 @app.post("/chat")
 async def chat(user_msg: UserMessage):
     try:
-        response = llm.invoke(user_msg.message)
+        async with chat_gate.slot(chat_gate.priority_for(user_msg.message)):
+            response = await run_in_threadpool(lambda: get_llm().invoke(user_msg.message))
         return {"reply": response.content}
+    except Overloaded as e:
+        return _overloaded_response(e)
     except Exception as e:
         logger.exception("Chat endpoint error")
         return {"error": str(e)}
@@ -67,48 +211,69 @@ async def chat(user_msg: UserMessage):
 # ==============================
 # Agent Endpoint (Autonomous)
 # ==============================
+def _run_agent(message: str, profile: bool = False, verbose: bool = False, session_id: Optional[str] = None):
+    """Runs in a worker thread; optionally samples that thread for the whole agent run."""
+    agent = get_agent()
+    if not profile:
+        return agent.query(message, verbose=verbose, session_id=session_id), None
+    with SamplingProfiler() as prof:
+        result = agent.query(message, verbose=verbose, session_id=session_id)
+    return result, prof.dump("agent")
+
 @app.post("/agent")
 async def agent_endpoint(
     user_msg: UserMessage,
     brief: bool = Query(True, description="Short Gemini summary"),
-    trace: bool = Query(False, description="Include reasoning trace")
+    trace: bool = Query(False, description="Include reasoning trace"),
+    profile: bool = Query(False, description="Dump a folded-stack profile (requires trace)"),
+    verbose: bool = Query(False, description="Echo the agent chain to the server console")
 ):
     """
     Autonomous AI Space Weather Agent.
     """
     try:
-        result = solar_agent.query(user_msg.message)
-        if not result["success"]:
-            return {"status": "error", "error": result.get("error", "Unknown failure")}
-
-        full_report = result.get("output", "").split("Invalid Format")[0].strip()
-
-        if brief:
-            summary_prompt = (
-                "Summarize the following solar activity report in 2–3 short sentences. "
-                "Highlight the overall trend, strongest flare, risk level, and Earth impact likelihood.\n\n"
-                f"{full_report}"
-            )
-            summary = llm.invoke(summary_prompt).content.strip()
-            output = summary
-            mode = "brief"
-        else:
-            output = full_report
-            mode = "full"
-
-        response = {
-            "status": "success",
-            "report": output,
-            "steps": len(result.get("intermediate_steps", [])),
-            "mode": mode,
-        }
-
-        if trace:
-            # attach reasoning steps for frontend visualization
-            response["trace"] = result.get("intermediate_steps", [])
-
-        return response
+        async with agent_gate.slot(agent_gate.priority_for(user_msg.message)):
+            result, profile_info = await run_in_threadpool(
+                _run_agent, user_msg.message, trace and profile, verbose, user_msg.session_id)
+            if not result["success"]:
+                return {"status": "error", "error": result.get("error", "Unknown failure")}
+
+            full_report = result.get("output", "").split("Invalid Format")[0].strip()
+
+            if brief:
+                summary_prompt = (
+                    "Summarize the following solar activity report in 2–3 short sentences. "
+                    "Highlight the overall trend, strongest flare, risk level, and Earth impact likelihood.\n\n"
+                    f"{full_report}"
+                )
+                summary_started = time.perf_counter()
+                summary = (await run_in_threadpool(lambda: get_llm().invoke(summary_prompt))).content.strip()
+                summary_ms = round((time.perf_counter() - summary_started) * 1000, 2)
+                output = summary
+                mode = "brief"
+            else:
+                output = full_report
+                mode = "full"
+                summary_ms = None
+
+            response = {
+                "status": "success",
+                "report": output,
+                "steps": len(result.get("intermediate_steps", [])),
+                "mode": mode,
+            }
+
+            if trace:
+                # attach reasoning steps for frontend visualization
+                response["trace"] = result.get("intermediate_steps", [])
+                response["timing"] = {**result.get("timing", {}), "summary_ms": summary_ms}
+                if profile_info:
+                    response["profile"] = profile_info
+
+            return response
 
+    except Overloaded as e:
+        return _overloaded_response(e)
     except Exception as e:
         logger.exception("Agent endpoint failed")
         return {"status": "failed", "error": str(e)}
@@ -117,9 +282,10 @@ async def agent_endpoint(
 # NASA Tools Routes
 # ==============================
 @app.get("/kp-index")
-async def get_kp_index(days_back: int = Query(1, description="Days back to fetch Kp index (1–7 recommended)")):
+def get_kp_index(days_back: int = Query(1, description="Days back to fetch Kp index (1–7 recommended)")):
     """
     Fetch the most recent Kp index data (geomagnetic activity).
+    Plain def so FastAPI runs it in the threadpool: fetch_once may wait on another worker's fetch.
     """
     try:
         result = fetch_nasa_kp_index(days_back)
@@ -131,10 +297,96 @@ async def get_kp_index(days_back: int = Query(1, description="Days back to fetch
 def get_solar_flares(days_back: int = Query(7, ge=1, le=30)):
     return json.loads(fetch_nasa_solar_flares(days_back))
 
+# ==============================
+# Indexed Flare Queries
+# ==============================
+def _index_timing(started, queried):
+    """total_us includes refreshing the index from the cached DONKI window; query_us is the lookup alone."""
+    now = time.perf_counter()
+    return {"total_us": round((now - started) * 1e6, 1), "query_us": round((now - queried) * 1e6, 1)}
+
+def _index_response(records, started, queried, **extra):
+    return {
+        "status": "success",
+        **extra,
+        "count": len(records),
+        "flares": [r.to_dict() for r in records],
+        **_index_timing(started, queried),
+    }
+
+@app.get("/nasa/flares/window")
+def flares_in_window(
+    hours: Optional[float] = Query(None, gt=0, description="Trailing window; ignored if start is given"),
+    start: Optional[str] = Query(None, description="ISO start, e.g. 2024-05-10T00:00Z"),
+    end: Optional[str] = Query(None, description="ISO end (default: now)"),
+):
+    from flare_index import FLARE_INDEX, window_bounds, days_needed
+    try:
+        start_ts, end_ts = window_bounds(hours, start, end)
+    except ValueError as e:
+        return {"status": "error", "error": str(e)}
+    started = time.perf_counter()
+    FLARE_INDEX.ensure_recent(days_needed(start_ts))
+    queried = time.perf_counter()
+    return _index_response(FLARE_INDEX.window(start_ts, end_ts), started, queried)
+
+@app.get("/nasa/flares/max")
+def max_flare(
+    hours: Optional[float] = Query(6, gt=0),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+):
+    from flare_index import FLARE_INDEX, window_bounds, days_needed
+    try:
+        start_ts, end_ts = window_bounds(hours, start, end)
+    except ValueError as e:
+        return {"status": "error", "error": str(e)}
+    started = time.perf_counter()
+    FLARE_INDEX.ensure_recent(days_needed(start_ts))
+    queried = time.perf_counter()
+    record = FLARE_INDEX.max_in_window(start_ts, end_ts)
+    return {
+        "status": "success",
+        "max_flare": record.to_dict() if record else None,
+        **_index_timing(started, queried),
+    }
+
+@app.get("/nasa/flares/region/{region}")
+def flares_by_region(region: int, start: Optional[str] = None, end: Optional[str] = None):
+    from flare_index import FLARE_INDEX, open_bounds
+    try:
+        bounds = open_bounds(start, end)
+    except ValueError as e:
+        return {"status": "error", "error": str(e)}
+    started = time.perf_counter()
+    FLARE_INDEX.ensure_recent()
+    queried = time.perf_counter()
+    return _index_response(FLARE_INDEX.by_region(region, *bounds), started, queried, region=region)
+
+@app.post("/nasa/flares/index/backfill")
+def backfill_flare_index(start_date: str = Query(..., description="YYYY-MM-DD"),
+                         end_date: Optional[str] = Query(None, description="YYYY-MM-DD (default: today)")):
+    """Load multi-year history into the index (one DONKI request per 30 days, up to ~3 years per call)."""
+    from datetime import datetime
+    from flare_index import FLARE_INDEX
+    try:
+        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+        end_dt = datetime.strptime(end_date, "%Y-%m-%d") if end_date else datetime.utcnow()
+        added = FLARE_INDEX.backfill(start_dt, end_dt)
+        return {"status": "success", "added": added, "index": FLARE_INDEX.stats()}
+    except Exception as e:
+        logger.exception("Flare index backfill failed")
+        return {"status": "error", "error": str(e)}
+
+@app.get("/nasa/flares/index")
+def flare_index_stats():
+    from flare_index import FLARE_INDEX
+    return FLARE_INDEX.stats()
+
 @app.get("/nasa/analysis")
 def get_flare_analysis(days_back: int = Query(7, ge=1, le=30)):
     flares = fetch_nasa_solar_flares(days_back)
-    return json.loads(analyze_flare_escalation(flares))
+    return json.loads(cached_flare_analysis(flares))
 
 @app.get("/nasa/impact")
 def predict_impact(flare_class: str = "M5.2", source_location: str = "N10W30"):
@@ -148,6 +400,49 @@ def satellite_vulnerability(flare_class: str = "M5.2", kp_index: int = 5):
 def operational_alert(risk_level: str = "HIGH", flare_class: str = "M5.2", impact_hours: int = 48):
     return json.loads(generate_operational_alert(risk_level, flare_class, impact_hours))
 
+def _current_conditions(flare_class: Optional[str], kp_index: Optional[float]):
+    if flare_class is None:
+        flares = json.loads(fetch_nasa_solar_flares(1)) or [{"classType": "C1.0"}]
+        flare_class = max((f.get("classType", "") for f in flares), key=flare_intensity) or "C1.0"
+    if kp_index is None:
+        kp_index = float(fetch_nasa_kp_index(1).get("kp_index", 5))
+    return flare_class, kp_index
+
+@app.post("/nasa/fleet/vulnerability")
+def fleet_vulnerability(req: FleetRequest):
+    """Score every satellite in the catalog against current (or given) conditions, highest risk first."""
+    import fleet  # NumPy is only loaded by workers that serve fleet scoring
+    flare_class, kp_index = _current_conditions(req.flare_class, req.kp_index)
+    sats = [s.model_dump() for s in req.satellites]
+    return {"status": "success", **fleet.score_fleet(sats, flare_class, kp_index, top=req.top)}
+
+# ==============================
+# What-if Scenario Grid
+# ==============================
+@app.get("/nasa/scenarios")
+def scenario_axes():
+    import scenarios
+    return scenarios.describe()
+
+@app.get("/nasa/scenarios/heatmap")
+def scenario_heatmap(
+    metric: str = Query("combined_risk", description="cme_likely, arrival_hours, kp_estimate, impact_probability, severity, combined_risk"),
+    x: str = Query("kp", description="flare_class, magnitude, longitude or kp"),
+    y: str = Query("magnitude"),
+    flare_class: str = "M",
+    magnitude: float = 5.0,
+    longitude: int = Query(30, description="Source longitude, negative = east"),
+    kp: int = 5,
+    encoding: str = Query("rows", pattern="^(rows|b64)$"),
+):
+    """Slice of the precomputed flare class x magnitude x longitude x Kp grid, for dashboard heatmaps."""
+    import scenarios
+    fixed = {"flare_class": flare_class, "magnitude": magnitude, "longitude": longitude, "kp": kp}
+    try:
+        return scenarios.heatmap(metric, x, y, fixed, encoding)
+    except ValueError as e:
+        return {"status": "error", "error": str(e)}
+
 @app.get("/")
 def root():
     return {"message": "🛰️ AstroPulse backend active (Gemini + NASA tools)"}
\ No newline at end of file
@@ -0,0 +1,193 @@
+# filename: metrics.py
+"""
+Minimal in-process Prometheus-style metrics (counters + histograms).
+
+No external dependency: each metric keeps a dict of label-tuple -> values behind
+a single lock, and bucket lookup is a bisect, so recording is a few microseconds.
+`render()` produces the Prometheus text exposition format served at /metrics.
+"""
+import functools, threading, time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+ITERATION_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 12, 15)
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_fmt_labels(self.labels, k)} {_fmt_value(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label-tuple -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[idx] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += count
+                le = f'le="{_fmt_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {_fmt_value(row[-1])}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Metric whose samples are read from a callback at scrape time (e.g. queue depth)."""
+
+    def __init__(self, name: str, help: str, kind: str,
+                 fn: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        self.name, self.help, self.kind, self.fn = name, help, kind, fn
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.fn():
+            names = tuple(labels)
+            lines.append(f"{self.name}{_fmt_labels(names, tuple(labels[n] for n in names))} {_fmt_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines += m.collect()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ==============================
+# AstroPulse metrics
+# ==============================
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "astropulse_http_request_seconds", "Latency of backend HTTP routes.", ("method", "route", "status")))
+TOOL_SECONDS = REGISTRY.register(Histogram(
+    "astropulse_tool_seconds", "Latency of nasa_tools tool functions.", ("tool",)))
+UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    "astropulse_upstream_request_seconds", "Latency of upstream HTTP fetches.", ("upstream", "status")))
+LLM_SECONDS = REGISTRY.register(Histogram(
+    "astropulse_llm_request_seconds", "Latency of individual LLM calls.", ("model",)))
+LLM_TOKENS = REGISTRY.register(Histogram(
+    "astropulse_llm_tokens", "Prompt/completion tokens per LLM call.", ("model", "type"), TOKEN_BUCKETS))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "astropulse_cache_requests_total", "Cache lookups by result.", ("cache", "result")))
+AGENT_ITERATIONS = REGISTRY.register(Histogram(
+    "astropulse_agent_iterations", "Tool-calling iterations per agent query.", (), ITERATION_BUCKETS))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def instrument_tool(fn):
+    """Record the latency of a tool function under its own name."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            TOOL_SECONDS.observe(time.perf_counter() - start, tool=name)
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every request by its route template (not raw path)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                route=getattr(route, "path", "unmatched"),
+                status=status["code"],
+            )
@@ -1,11 +1,13 @@
 # filename: nasa_tools.py
-import os, json, requests
+import os, json, time, hashlib, requests
 from datetime import datetime, timedelta
-from loguru import logger
 from dotenv import load_dotenv
 # helper parsers (place near top of nasa_tools.py)
 import json
 from typing import Any,Dict
+from metrics import CACHE_REQUESTS, UPSTREAM_SECONDS, instrument_tool
+from logging_config import configure_logging, get_logger
+from shared_store import fetch_once, get_store
 
 def _ensure_dict(value: Any) -> dict:
     """
@@ -77,16 +79,61 @@ def _ensure_list(value: Any) -> list:
 
 load_dotenv()
 NASA_API_KEY = os.getenv("NASA_API_KEY", "DEMO_KEY")
-NASA_BASE_URL = "https://api.nasa.gov/DONKI"
+# Base URLs are configurable so the backend can be pointed at benchmarks/replay_server.py.
+NASA_BASE_URL = os.getenv("NASA_BASE_URL", "https://api.nasa.gov/DONKI").rstrip("/")
+SWPC_BASE_URL = os.getenv("SWPC_BASE_URL", "https://services.swpc.noaa.gov").rstrip("/")
+SWPC_KP_URLS = [
+    f"{SWPC_BASE_URL}/json/planetary_k_index_1d.json",  # primary
+    f"{SWPC_BASE_URL}/json/planetary_k_index_1m.json",  # backup
+]
 CACHE_ENABLED = os.getenv("ENABLE_CACHE", "true").lower() == "true"
-_cache = {}
+# Today's window keeps growing, so cached flares expire; 0 disables expiry.
+FLARE_CACHE_TTL = float(os.getenv("FLARE_CACHE_TTL", "900")) or None
+KP_CACHE_TTL = float(os.getenv("KP_CACHE_TTL", "60")) or None
+# Shared across uvicorn workers when ASTROPULSE_STORE is sqlite/redis (see shared_store.py).
+_cache = get_store()
 
-logger.remove()
-logger.add(lambda msg: print(msg, end=""), level="INFO")
+configure_logging()
+logger = get_logger("nasa")
+cache_log = get_logger("cache")  # sampled by default (LOG_SAMPLE)
+
+
+def _http_get(url: str, **kwargs) -> requests.Response:
+    """requests.get that records per-upstream latency (keyed by URL without query string)."""
+    start = time.perf_counter()
+    status = "error"
+    try:
+        res = requests.get(url, **kwargs)
+        status = res.status_code
+        return res
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - start, upstream=url, status=status)
 
 # ==============================
 # 1. Fetch Solar Flares
 # ==============================
+def download_flares(start_str: str, end_str: str) -> str:
+    url = f"{NASA_BASE_URL}/FLR"
+    params = {"startDate": start_str, "endDate": end_str, "api_key": NASA_API_KEY}
+    res = _http_get(url, params=params, timeout=15)
+    res.raise_for_status()
+    data = res.json()
+
+    flares = [
+        {
+            "flareID": f.get("flrID", "Unknown"),
+            "beginTime": f.get("beginTime", ""),
+            "peakTime": f.get("peakTime", ""),
+            "classType": f.get("classType", "Unknown"),
+            "sourceLocation": f.get("sourceLocation", "Unknown"),
+            "activeRegionNum": f.get("activeRegionNum", 0),
+        }
+        for f in data
+    ]
+    logger.info(f"[NASA] Retrieved {len(flares)} flares\n")
+    return json.dumps(flares, indent=2)
+
+@instrument_tool
 def fetch_nasa_solar_flares(days_back: int = 7) -> str:
     # handle cases where input is a JSON string or dict
     if isinstance(days_back, (str, bytes)):
@@ -105,32 +152,22 @@ def fetch_nasa_solar_flares(days_back: int = 7) -> str:
     start_str, end_str = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
     cache_key = f"flares_{start_str}_{end_str}"
 
-    if CACHE_ENABLED and cache_key in _cache:
-        logger.info(f"[CACHE] Using cached data {start_str} → {end_str}\n")
-        return _cache[cache_key]
+    if CACHE_ENABLED:
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            CACHE_REQUESTS.inc(cache="flares", result="hit")
+            cache_log.info(f"[CACHE] Using cached data {start_str} → {end_str}\n")
+            return cached
+        CACHE_REQUESTS.inc(cache="flares", result="miss")
 
     try:
-        url = f"{NASA_BASE_URL}/FLR"
-        params = {"startDate": start_str, "endDate": end_str, "api_key": NASA_API_KEY}
-        res = requests.get(url, params=params, timeout=15)
-        res.raise_for_status()
-        data = res.json()
-
-        flares = [
-            {
-                "flareID": f.get("flrID", "Unknown"),
-                "beginTime": f.get("beginTime", ""),
-                "peakTime": f.get("peakTime", ""),
-                "classType": f.get("classType", "Unknown"),
-                "sourceLocation": f.get("sourceLocation", "Unknown"),
-                "activeRegionNum": f.get("activeRegionNum", 0),
-            }
-            for f in data
-        ]
-        result = json.dumps(flares, indent=2)
-        if CACHE_ENABLED:
-            _cache[cache_key] = result
-        logger.info(f"[NASA] Retrieved {len(flares)} flares\n")
+        if not CACHE_ENABLED:
+            return download_flares(start_str, end_str)
+        # Another worker may already be fetching this window; wait for its result instead.
+        result, coalesced = fetch_once(_cache, cache_key, lambda: download_flares(start_str, end_str),
+                                       ttl=FLARE_CACHE_TTL)
+        if coalesced:
+            CACHE_REQUESTS.inc(cache="flares", result="coalesced")
         return result
 
     except Exception as e:
@@ -148,6 +185,17 @@ def fetch_nasa_solar_flares(days_back: int = 7) -> str:
 # ==============================
 # 2. Analyze Escalation
 # ==============================
+def flare_intensity(c: str) -> float:
+    """Flare class to a linear intensity scale: C1.0 = 1, M1.0 = 10, X1.0 = 100 (0 if unparseable)."""
+    if not c:
+        return 0
+    mult = {"C": 1, "M": 10, "X": 100}
+    try:
+        return mult.get(c[0].upper(), 0) * float(c[1:])
+    except Exception:
+        return 0
+
+@instrument_tool
 def analyze_flare_escalation(flares_json: str) -> str:
     """Analyze trend and risk level in recent solar flare activity."""
     try:
@@ -176,15 +224,7 @@ def analyze_flare_escalation(flares_json: str) -> str:
             })
 
         # --- Convert flare classes to numeric intensities ---
-        def val(c):
-            if not c:
-                return 0
-            mult = {"C": 1, "M": 10, "X": 100}
-            try:
-                return mult.get(c[0].upper(), 0) * float(c[1:])
-            except Exception:
-                return 0
-
+        val = flare_intensity
         vals = [val(f.get("classType", "")) for f in flares if val(f.get("classType", "")) > 0]
         if not vals:
             return json.dumps({
@@ -229,9 +269,45 @@ def analyze_flare_escalation(flares_json: str) -> str:
         logger.error(f"[ANALYSIS ERROR] {e}\n")
         return json.dumps({"error": str(e)})
 
+def cached_flare_analysis(flares_json: str) -> str:
+    """analyze_flare_escalation memoized on the flare payload, so snapshots can carry precomputed analyses."""
+    if not CACHE_ENABLED or not isinstance(flares_json, str):
+        return analyze_flare_escalation(flares_json)
+    cache_key = "analysis_" + hashlib.sha1(flares_json.encode()).hexdigest()
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        CACHE_REQUESTS.inc(cache="analysis", result="hit")
+        return cached
+    CACHE_REQUESTS.inc(cache="analysis", result="miss")
+    result = analyze_flare_escalation(flares_json)
+    _cache.set(cache_key, result, ttl=FLARE_CACHE_TTL)
+    return result
+
 # ==============================
 # 3. Predict Magnetosphere Impact
 # ==============================
+def cme_estimate(c: str, m: float):
+    """(cme_likely, arrival_hours, kp_estimate) for a flare class letter and magnitude."""
+    cme_likely = (c == "X") or (c == "M" and m >= 1)
+    if not cme_likely:
+        return False, None, None
+    speed = 500 * (2.0 + m / 10 if c == "X" else 1.2 + m / 20)
+    hrs = int((1.5e8 / speed) / 3600)
+    kp = 8 if (c == "X" and m >= 5) else 7 if c == "X" else 6 if m >= 5 else 5
+    return True, hrs, kp
+
+
+def impact_probability(source_location: str):
+    """(probability, reason) that a CME from this source location hits Earth directly."""
+    if not source_location or "Unknown" in source_location:
+        return "MODERATE", "source location is unknown."
+    if "E" in source_location:
+        return "LOW", f"its location at {source_location} is on the eastern limb, so a CME is likely to miss Earth."
+    if "W" in source_location:
+        return "HIGH", f"its location at {source_location} is on the western limb, which is geo-effective."
+    return "MODERATE", f"its location at {source_location} is near the center."
+
+@instrument_tool
 def predict_magnetosphere_impact(flare_class: str, source_location: str = "N10W10") -> str:
     """Predict Earth's magnetosphere impact from a solar flare."""
     try:
@@ -269,7 +345,7 @@ def predict_magnetosphere_impact(flare_class: str, source_location: str = "N10W1
             m = 1.0
 
         # --- Physical approximations ---
-        cme_likely = (c == "X") or (c == "M" and m >= 1)
+        cme_likely, hrs, kp = cme_estimate(c, m)
         if not cme_likely:
             return json.dumps({
                 "cme_likely": False,
@@ -277,23 +353,7 @@ def predict_magnetosphere_impact(flare_class: str, source_location: str = "N10W1
                 "explanation": f"{flare_class} flares rarely produce Earth-directed CMEs."
             })
 
-        speed = 500 * (2.0 + m / 10 if c == "X" else 1.2 + m / 20)
-        hrs = int((1.5e8 / speed) / 3600)
-        kp = 8 if (c == "X" and m >= 5) else 7 if c == "X" else 6 if m >= 5 else 5
-
-        if not source_location or "Unknown" in source_location:
-            prob = "MODERATE"
-            prob_reason = "source location is unknown."
-        elif "E" in source_location:
-            prob = "LOW"
-            prob_reason = f"its location at {source_location} is on the eastern limb, so a CME is likely to miss Earth."
-        elif "W" in source_location:
-            prob = "HIGH"
-            prob_reason = f"its location at {source_location} is on the western limb, which is geo-effective."
-        else:
-            prob = "MODERATE"
-            prob_reason = f"its location at {source_location} is near the center."
-
+        prob, prob_reason = impact_probability(source_location)
 
         effects = (
             ["Severe GPS disruptions", "Radio blackouts", "Aurora at mid-latitudes"]
@@ -322,6 +382,16 @@ def predict_magnetosphere_impact(flare_class: str, source_location: str = "N10W1
 # ==============================
 # 4. Satellite Vulnerability
 # ==============================
+def vulnerability_severity(flare_class: str, kp_index: float) -> str:
+    """Overall satellite severity from flare class and Kp (shared with fleet/scenario scoring)."""
+    return (
+        "SEVERE" if kp_index >= 7 or flare_class.startswith("X")
+        else "HIGH" if kp_index >= 5 or flare_class.startswith("M")
+        else "MODERATE" if kp_index >= 4
+        else "LOW"
+    )
+
+@instrument_tool
 def calculate_satellite_vulnerability(flare_class: str, kp_index: int = None) -> str:
     """Estimate satellite vulnerability based on flare class and geomagnetic activity (Kp index)."""
     try:
@@ -371,12 +441,7 @@ def calculate_satellite_vulnerability(flare_class: str, kp_index: int = None) ->
             kp_index = 5
 
         # --- Severity logic ---
-        sev = (
-            "SEVERE" if kp_index >= 7 or flare_class.startswith("X")
-            else "HIGH" if kp_index >= 5 or flare_class.startswith("M")
-            else "MODERATE" if kp_index >= 4
-            else "LOW"
-        )
+        sev = vulnerability_severity(flare_class, kp_index)
 
         def v(risk, issues, recs):
             return {"risk": risk, "issues": issues, "recommendations": recs}
@@ -415,6 +480,7 @@ def calculate_satellite_vulnerability(flare_class: str, kp_index: int = None) ->
 # ==============================
 # 5. Generate Operational Alert
 # ==============================
+@instrument_tool
 def generate_operational_alert(risk_level="MODERATE", flare_class="M5.0", impact_hours=48) -> str:
     """Generate a structured operational alert for space weather operators."""
     try:
@@ -497,6 +563,27 @@ def generate_operational_alert(risk_level="MODERATE", flare_class="M5.0", impact
         return json.dumps({"error": str(e)})
 
 #tool 6
+def _kp_series(url: str) -> str:
+    """Raw SWPC Kp series as JSON text, shared between workers for KP_CACHE_TTL seconds."""
+    def download():
+        r = _http_get(url, timeout=10)
+        r.raise_for_status()
+        return r.text
+
+    if not CACHE_ENABLED:
+        return download()
+    cache_key = f"kp_{url}"
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        CACHE_REQUESTS.inc(cache="kp", result="hit")
+        return cached
+    CACHE_REQUESTS.inc(cache="kp", result="miss")
+    value, coalesced = fetch_once(_cache, cache_key, download, ttl=KP_CACHE_TTL)
+    if coalesced:
+        CACHE_REQUESTS.inc(cache="kp", result="coalesced")
+    return value
+
+@instrument_tool
 def fetch_nasa_kp_index(days_back: int = 1) -> Dict[str, Any]:
     """Fetches recent Kp index from NOAA SWPC with fallback to static NASA data."""
     try:
@@ -513,19 +600,12 @@ def fetch_nasa_kp_index(days_back: int = 1) -> Dict[str, Any]:
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days_back)
 
-        urls = [
-            "https://services.swpc.noaa.gov/json/planetary_k_index_1d.json",  # primary
-            "https://services.swpc.noaa.gov/json/planetary_k_index_1m.json"   # backup
-        ]
-
         kp_data = None
-        for url in urls:
+        for url in SWPC_KP_URLS:
             try:
-                r = requests.get(url, timeout=10)
-                if r.status_code == 200:
-                    kp_data = r.json()
-                    if isinstance(kp_data, list) and len(kp_data) > 0:
-                        break
+                kp_data = json.loads(_kp_series(url))
+                if isinstance(kp_data, list) and len(kp_data) > 0:
+                    break
             except Exception as e:
                 logger.warning(f"[KPINDEX] {url} failed: {e}")
                 continue
@@ -0,0 +1,79 @@
+# filename: profiling.py
+import os, sys, threading, time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+
+class SamplingProfiler:
+    """
+    Tiny wall-clock sampling profiler for a single thread.
+
+    A daemon thread snapshots the target thread's stack every `interval` seconds
+    and counts identical stacks. `dump()` writes them in the folded format
+    ("frame;frame;frame count") that flamegraph.pl and speedscope read directly.
+
+        with SamplingProfiler() as prof:   # profiles the calling thread
+            agent.query(question)
+        prof.dump("agent")
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = 0.0
+        self.duration = 0.0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def start(self) -> None:
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="astropulse-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def dump(self, label: str = "profile") -> Dict[str, Any]:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{label}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')}.folded")
+        with open(path, "w") as fh:
+            fh.write(self.folded())
+        return {
+            "path": path,
+            "format": "folded",
+            "samples": sum(self.samples.values()),
+            "interval_ms": self.interval * 1000,
+            "duration_ms": round(self.duration * 1000, 2),
+        }
@@ -0,0 +1,152 @@
+# filename: scenarios.py
+"""
+Precomputed what-if grid over flare class x magnitude x source longitude x Kp.
+
+Every cell is evaluated once with the same rules as predict_magnetosphere_impact
+(cme_estimate / impact_probability) and calculate_satellite_vulnerability
+(vulnerability_severity); the dashboard then reads 2-D slices as heatmaps.
+Each metric is stored only over the axes it depends on, then broadcast when sliced.
+"""
+import base64
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from nasa_tools import cme_estimate, impact_probability, vulnerability_severity
+
+CLASSES = ("C", "M", "X")
+MAGNITUDES = np.round(np.arange(1.0, 10.0, 0.1), 1)
+LONGITUDES = np.arange(-90, 91, 5)  # negative = east, positive = west
+KP_VALUES = np.arange(0, 10)
+
+AXES = ("flare_class", "magnitude", "longitude", "kp")
+AXIS_VALUES = {
+    "flare_class": np.array(CLASSES),
+    "magnitude": MAGNITUDES,
+    "longitude": LONGITUDES,
+    "kp": KP_VALUES,
+}
+
+PROBABILITY_CODES = {"LOW": 0, "MODERATE": 1, "HIGH": 2}
+SEVERITY_CODES = {"LOW": 0, "MODERATE": 1, "HIGH": 2, "SEVERE": 3}
+
+METRICS = {
+    # name: (axes it depends on, legend or None for numeric values)
+    "cme_likely": (("flare_class", "magnitude"), {0: "NO", 1: "YES"}),
+    "arrival_hours": (("flare_class", "magnitude"), None),
+    "kp_estimate": (("flare_class", "magnitude"), None),
+    "impact_probability": (("flare_class", "magnitude", "longitude"), {v: k for k, v in PROBABILITY_CODES.items()}),
+    "severity": (("flare_class", "magnitude", "kp"), {v: k for k, v in SEVERITY_CODES.items()}),
+    "combined_risk": (AXES, {v: k for k, v in SEVERITY_CODES.items()}),
+}
+
+
+def location_for(longitude: int) -> str:
+    if longitude == 0:
+        return "N00"  # disk centre: neither limb
+    return f"N00{'E' if longitude < 0 else 'W'}{abs(int(longitude)):02d}"
+
+
+@lru_cache(maxsize=1)
+def scenario_grid() -> Dict[str, np.ndarray]:
+    nc, nm, nl, nk = len(CLASSES), len(MAGNITUDES), len(LONGITUDES), len(KP_VALUES)
+    cme = np.zeros((nc, nm), dtype=np.int8)
+    arrival = np.full((nc, nm), -1, dtype=np.int16)   # -1: no Earth-directed CME expected
+    kp_est = np.zeros((nc, nm), dtype=np.int8)
+    prob = np.zeros((nc, nm, nl), dtype=np.int8)
+    severity = np.zeros((nc, nm, nk), dtype=np.int8)
+
+    # Impact probability only depends on the source location, not on the flare.
+    location_prob = np.array([PROBABILITY_CODES[impact_probability(location_for(lon))[0]] for lon in LONGITUDES],
+                             dtype=np.int8)
+
+    for ci, c in enumerate(CLASSES):
+        for mi, m in enumerate(MAGNITUDES.tolist()):
+            likely, hrs, kp = cme_estimate(c, m)
+            if likely:
+                cme[ci, mi], arrival[ci, mi], kp_est[ci, mi] = 1, hrs, kp
+                prob[ci, mi] = location_prob
+            else:
+                prob[ci, mi] = PROBABILITY_CODES["LOW"]
+            flare_class = f"{c}{m}"
+            for ki, k in enumerate(KP_VALUES.tolist()):
+                severity[ci, mi, ki] = SEVERITY_CODES[vulnerability_severity(flare_class, k)]
+
+    # Satellite severity discounted by how unlikely a direct hit is: HIGH keeps it, LOW drops two levels.
+    combined = np.clip(severity[:, :, None, :] - (2 - prob[:, :, :, None]), 0, 3).astype(np.int8)
+
+    return {
+        "cme_likely": cme,
+        "arrival_hours": arrival,
+        "kp_estimate": kp_est,
+        "impact_probability": prob,
+        "severity": severity,
+        "combined_risk": combined,
+    }
+
+
+def _index(axis: str, value) -> int:
+    values = AXIS_VALUES[axis]
+    if axis == "flare_class":
+        return CLASSES.index(str(value)[0].upper()) if value and str(value)[0].upper() in CLASSES else 1
+    return int(np.abs(values - float(value)).argmin())
+
+
+def heatmap(metric: str, x: str, y: str, fixed: Optional[Dict[str, Any]] = None,
+            encoding: str = "rows") -> Dict[str, Any]:
+    """2-D slice of `metric` with `x` across and `y` down; other axes pinned by `fixed`."""
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; choose from {sorted(METRICS)}")
+    if x not in AXES or y not in AXES or x == y:
+        raise ValueError(f"x and y must be two different axes from {AXES}")
+    return _heatmap(metric, x, y, tuple(sorted((fixed or {}).items())), encoding)
+
+
+@lru_cache(maxsize=256)
+def _heatmap(metric: str, x: str, y: str, fixed: tuple, encoding: str) -> Dict[str, Any]:
+    axes, legend = METRICS[metric]
+    data = scenario_grid()[metric]
+    fixed = dict(fixed)
+    defaults = {"flare_class": "M", "magnitude": 5.0, "longitude": 30, "kp": 5}
+
+    # Broadcast to the full 4-D grid as a view (no copy), then pin every axis except x/y.
+    shape = [len(AXIS_VALUES[a]) if a in axes else 1 for a in AXES]
+    full = np.broadcast_to(data.reshape(shape), [len(AXIS_VALUES[a]) for a in AXES])
+    index = []
+    pinned = {}
+    for a in AXES:
+        if a in (x, y):
+            index.append(slice(None))
+        else:
+            i = _index(a, fixed.get(a, defaults[a]))
+            index.append(i)
+            pinned[a] = AXIS_VALUES[a][i].item()
+    plane = full[tuple(index)]
+    remaining = [a for a in AXES if a in (x, y)]
+    if remaining != [y, x]:
+        plane = plane.T
+    plane = np.ascontiguousarray(plane)
+
+    result = {
+        "metric": metric,
+        "x": {"axis": x, "labels": AXIS_VALUES[x].tolist()},
+        "y": {"axis": y, "labels": AXIS_VALUES[y].tolist()},
+        "fixed": pinned,
+        "legend": {str(k): v for k, v in legend.items()} if legend else None,
+        "shape": list(plane.shape),
+    }
+    if encoding == "b64":
+        result["dtype"] = plane.dtype.str
+        result["values"] = base64.b64encode(plane.tobytes()).decode()
+    else:
+        result["values"] = plane.tolist()
+    return result
+
+
+def describe() -> Dict[str, Any]:
+    return {
+        "axes": {a: AXIS_VALUES[a].tolist() for a in AXES},
+        "metrics": {name: {"axes": list(axes), "legend": legend} for name, (axes, legend) in METRICS.items()},
+        "cells": int(np.prod([len(AXIS_VALUES[a]) for a in AXES])),
+    }
@@ -0,0 +1,371 @@
+# filename: shared_store.py
+"""
+Pluggable key/value + list store shared by all uvicorn workers.
+
+Selected with ASTROPULSE_STORE:
+
+    memory                      per-process dict (default, single worker)
+    sqlite                      SQLite in /dev/shm (tmpfs) so every worker on the host shares it
+    sqlite:///path/to/file.db   SQLite at an explicit path
+    redis://host:6379/0         any Redis-compatible server (needs the `redis` package)
+
+Values are strings (callers store JSON). Everything goes through the small
+SharedStore interface, so another backend only has to implement those methods.
+"""
+import os, sqlite3, tempfile, threading, time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+class SharedStore:
+    """Interface every backend implements. `ttl` is in seconds; None means no expiry."""
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Set only if absent; returns True if this call created the key (used as a lease)."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def append(self, key: str, value: str, keep: Optional[int] = None, ttl: Optional[float] = None) -> None:
+        """Push onto a list, optionally trimming it to the newest `keep` items.
+
+        `ttl` is an idle expiry: each append pushes the whole list's expiry out again.
+        """
+        raise NotImplementedError
+
+    def range(self, key: str) -> List[str]:
+        raise NotImplementedError
+
+    def clear_list(self, key: str) -> None:
+        raise NotImplementedError
+
+    def scan(self, prefix: str = "") -> Iterator[Tuple[str, str, float, Optional[float]]]:
+        """(key, value, created_at, expires_at) for live keys starting with `prefix`."""
+        raise NotImplementedError
+
+
+# ==============================
+# In-process backend
+# ==============================
+class MemoryStore(SharedStore):
+    PURGE_EVERY = 500
+
+    def __init__(self):
+        self._kv = {}  # key -> (value, created_at, expires_at)
+        self._lists = {}  # key -> [items, expires_at]
+        self._lock = threading.Lock()
+        self._appends = 0
+
+    def _live(self, key, now):
+        entry = self._kv.get(key)
+        if entry is not None and entry[2] is not None and entry[2] <= now:
+            del self._kv[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.time())
+        return entry[0] if entry else None
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            self._kv[key] = (value, now, now + ttl if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return False
+            self._kv[key] = (value, now, now + ttl if ttl else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._kv.pop(key, None)
+
+    def _live_list(self, key, now):
+        entry = self._lists.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._lists[key]
+            return None
+        return entry
+
+    def append(self, key, value, keep=None, ttl=None):
+        now = time.time()
+        with self._lock:
+            self._appends += 1
+            if self._appends % self.PURGE_EVERY == 0:
+                for k in [k for k, e in self._lists.items() if e[1] is not None and e[1] <= now]:
+                    del self._lists[k]
+            entry = self._live_list(key, now)
+            if entry is None:
+                entry = self._lists[key] = [[], None]
+            items = entry[0]
+            items.append(value)
+            if keep is not None and len(items) > keep:
+                del items[:-keep]
+            entry[1] = now + ttl if ttl else None
+
+    def range(self, key):
+        with self._lock:
+            entry = self._live_list(key, time.time())
+            return list(entry[0]) if entry else []
+
+    def clear_list(self, key):
+        with self._lock:
+            self._lists.pop(key, None)
+
+    def scan(self, prefix=""):
+        now = time.time()
+        with self._lock:
+            rows = [(k, v[0], v[1], v[2]) for k, v in self._kv.items()
+                    if k.startswith(prefix) and (v[2] is None or v[2] > now)]
+        return iter(rows)
+
+
+# ==============================
+# SQLite backend (shared across worker processes on one host)
+# ==============================
+class SQLiteStore(SharedStore):
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        with self._conn() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                       "created REAL NOT NULL, expires REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS lists (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                       "key TEXT NOT NULL, value TEXT NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS lists_key ON lists (key, id)")
+            db.execute("CREATE TABLE IF NOT EXISTS list_expiry (key TEXT PRIMARY KEY, expires REAL NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _maybe_purge(self, db):
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            now = time.time()
+            db.execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires <= ?", (now,))
+            db.execute("DELETE FROM lists WHERE key IN (SELECT key FROM list_expiry WHERE expires <= ?)", (now,))
+            db.execute("DELETE FROM list_expiry WHERE expires <= ?", (now,))
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        db = self._conn()
+        db.execute("INSERT OR REPLACE INTO kv (key, value, created, expires) VALUES (?, ?, ?, ?)",
+                   (key, value, now, now + ttl if ttl else None))
+        self._maybe_purge(db)
+
+    def add(self, key, value, ttl=None):
+        now = time.time()
+        db = self._conn()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM kv WHERE key = ? AND expires IS NOT NULL AND expires <= ?", (key, now))
+            cur = db.execute("INSERT OR IGNORE INTO kv (key, value, created, expires) VALUES (?, ?, ?, ?)",
+                             (key, value, now, now + ttl if ttl else None))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return cur.rowcount == 1
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def append(self, key, value, keep=None, ttl=None):
+        now = time.time()
+        db = self._conn()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # An expired list starts over rather than being extended.
+            db.execute("DELETE FROM lists WHERE key = ? AND EXISTS "
+                       "(SELECT 1 FROM list_expiry WHERE key = ? AND expires <= ?)", (key, key, now))
+            db.execute("INSERT INTO lists (key, value) VALUES (?, ?)", (key, value))
+            if keep is not None:
+                db.execute("DELETE FROM lists WHERE key = ? AND id NOT IN "
+                           "(SELECT id FROM lists WHERE key = ? ORDER BY id DESC LIMIT ?)", (key, key, keep))
+            if ttl:
+                db.execute("INSERT OR REPLACE INTO list_expiry (key, expires) VALUES (?, ?)", (key, now + ttl))
+            else:
+                db.execute("DELETE FROM list_expiry WHERE key = ?", (key,))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        self._maybe_purge(db)
+
+    def range(self, key):
+        return [r[0] for r in self._conn().execute(
+            "SELECT value FROM lists WHERE key = ? AND NOT EXISTS "
+            "(SELECT 1 FROM list_expiry WHERE key = ? AND expires <= ?) ORDER BY id", (key, key, time.time()))]
+
+    def clear_list(self, key):
+        db = self._conn()
+        db.execute("DELETE FROM lists WHERE key = ?", (key,))
+        db.execute("DELETE FROM list_expiry WHERE key = ?", (key,))
+
+    def scan(self, prefix=""):
+        rows = self._conn().execute(
+            "SELECT key, value, created, expires FROM kv WHERE key >= ? AND key < ? "
+            "AND (expires IS NULL OR expires > ?)", (prefix, prefix + "\uffff", time.time())
+        ).fetchall()
+        return iter(rows)
+
+
+# ==============================
+# Redis-compatible backend
+# ==============================
+class RedisStore(SharedStore):
+    # created_at lives in a companion key with the same TTL, so it expires with its value.
+    CREATED_PREFIX = "astropulse:created:"
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("ASTROPULSE_STORE=redis://... requires the `redis` package") from e
+        self._r = redis.Redis.from_url(url, decode_responses=True)
+
+    def _ttl_ms(self, ttl):
+        return int(ttl * 1000) if ttl else None
+
+    def get(self, key):
+        return self._r.get(key)
+
+    def set(self, key, value, ttl=None):
+        px = self._ttl_ms(ttl)
+        pipe = self._r.pipeline()
+        pipe.set(key, value, px=px)
+        pipe.set(self.CREATED_PREFIX + key, time.time(), px=px)
+        pipe.execute()
+
+    def add(self, key, value, ttl=None):
+        px = self._ttl_ms(ttl)
+        if not self._r.set(key, value, px=px, nx=True):
+            return False
+        self._r.set(self.CREATED_PREFIX + key, time.time(), px=px)
+        return True
+
+    def delete(self, key):
+        self._r.delete(key, self.CREATED_PREFIX + key)
+
+    def append(self, key, value, keep=None, ttl=None):
+        pipe = self._r.pipeline()
+        pipe.rpush(key, value)
+        if keep is not None:
+            pipe.ltrim(key, -keep, -1)
+        if ttl:
+            pipe.pexpire(key, self._ttl_ms(ttl))
+        else:
+            pipe.persist(key)
+        pipe.execute()
+
+    def range(self, key):
+        return self._r.lrange(key, 0, -1)
+
+    def clear_list(self, key):
+        self._r.delete(key)
+
+    def scan(self, prefix=""):
+        now = time.time()
+        for key in self._r.scan_iter(match=f"{prefix}*"):
+            if key.startswith(self.CREATED_PREFIX) or self._r.type(key) != "string":
+                continue
+            value, pttl = self._r.get(key), self._r.pttl(key)
+            if value is None:
+                continue
+            created = float(self._r.get(self.CREATED_PREFIX + key) or now)
+            yield key, value, created, now + pttl / 1000 if pttl and pttl > 0 else None
+
+
+# ==============================
+# Factory + single-flight helper
+# ==============================
+_store: Optional[SharedStore] = None
+_store_lock = threading.Lock()
+
+
+def _default_sqlite_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "astropulse-store.db")
+
+
+def create_store(spec: str) -> SharedStore:
+    spec = (spec or "memory").strip()
+    if spec == "memory":
+        return MemoryStore()
+    if spec == "sqlite":
+        return SQLiteStore(_default_sqlite_path())
+    if spec.startswith("sqlite:///"):
+        return SQLiteStore(spec[len("sqlite:///"):])
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(spec)
+    raise ValueError(f"Unsupported ASTROPULSE_STORE: {spec!r}")
+
+
+def get_store() -> SharedStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_store(os.getenv("ASTROPULSE_STORE", "memory"))
+    return _store
+
+
+def fetch_once(store: SharedStore, key: str, loader: Callable[[], str], ttl: Optional[float] = None,
+               lease_s: float = 20.0, wait_s: float = 15.0) -> Tuple[str, bool]:
+    """
+    Return store[key], calling `loader` at most once across all workers on a miss.
+
+    The first worker takes a short lease and fetches; the others poll for its
+    result instead of hitting the upstream too. Returns (value, fetched_by_someone_else).
+    Exceptions from `loader` propagate and nothing is stored.
+    """
+    value = store.get(key)
+    if value is not None:
+        return value, True
+
+    lease = f"lease:{key}"
+    if store.add(lease, str(os.getpid()), ttl=lease_s):
+        try:
+            value = loader()
+            store.set(key, value, ttl)
+            return value, False
+        finally:
+            store.delete(lease)
+
+    deadline = time.monotonic() + wait_s
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        value = store.get(key)
+        if value is not None:
+            return value, True
+        if store.get(lease) is None:
+            break  # the owner failed; fetch ourselves
+    value = loader()
+    store.set(key, value, ttl)
+    return value, False
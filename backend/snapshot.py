@@ -0,0 +1,112 @@
+# filename: snapshot.py
+"""
+Persist cache entries (flare windows, Kp series, precomputed analyses) to disk so a
+restarted worker serves warm responses immediately.
+
+File layout (little-endian):
+
+    header  8s magic "APSNAP01" | uint32 entry count | float64 written_at
+    index   per entry: uint16 key_len | uint64 offset | uint32 length | float64 created | float64 expires
+            followed by the utf-8 key
+    data    zlib-compressed values, addressed by (offset, length) from the start of the file
+
+Loading memory-maps the file and decompresses only entries that are still fresh.
+"""
+import math, mmap, os, struct, threading, time, zlib
+from typing import Dict, Iterable, Optional
+
+from logging_config import get_logger
+
+MAGIC = b"APSNAP01"
+_HEADER = struct.Struct("<8sId")
+_ENTRY = struct.Struct("<HQIdd")
+
+logger = get_logger("snapshot")
+
+SNAPSHOT_PATH = os.getenv("ASTROPULSE_SNAPSHOT", "snapshots/cache.snap")
+SNAPSHOT_PREFIXES = ("flares_", "kp_", "analysis_")
+# Entries without a TTL are still dropped if they are older than this.
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", "3600"))
+
+
+def save_snapshot(store, path: str = SNAPSHOT_PATH, prefixes: Iterable[str] = SNAPSHOT_PREFIXES) -> Dict[str, int]:
+    entries = [row for prefix in prefixes for row in store.scan(prefix)]
+    blobs = [zlib.compress(value.encode(), 6) for _, value, _, _ in entries]
+    keys = [key.encode() for key, _, _, _ in entries]
+
+    offset = _HEADER.size + sum(_ENTRY.size + len(k) for k in keys)
+    index = bytearray()
+    for key, blob, (_, _, created, expires) in zip(keys, blobs, entries):
+        index += _ENTRY.pack(len(key), offset, len(blob), created, math.nan if expires is None else expires)
+        index += key
+        offset += len(blob)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, len(entries), time.time()))
+        fh.write(index)
+        for blob in blobs:
+            fh.write(blob)
+    os.replace(tmp, path)  # atomic: readers never see a half-written file
+    return {"entries": len(entries), "bytes": offset}
+
+
+def load_snapshot(store, path: str = SNAPSHOT_PATH, max_age: float = SNAPSHOT_MAX_AGE) -> Dict[str, int]:
+    stats = {"loaded": 0, "stale": 0, "present": 0}
+    if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+        return stats
+
+    now = time.time()
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, count, _written_at = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an AstroPulse cache snapshot")
+        view = memoryview(mm)
+        try:
+            pos = _HEADER.size
+            for _ in range(count):
+                key_len, offset, length, created, expires = _ENTRY.unpack_from(mm, pos)
+                pos += _ENTRY.size
+                key = bytes(view[pos:pos + key_len]).decode()
+                pos += key_len
+
+                expires = None if math.isnan(expires) else expires
+                if (expires is not None and expires <= now) or now - created > max_age:
+                    stats["stale"] += 1
+                    continue
+                value = zlib.decompress(view[offset:offset + length]).decode()
+                # add(), not set(): never clobber a fresher entry another worker already stored.
+                if store.add(key, value, ttl=(expires - now) if expires is not None else None):
+                    stats["loaded"] += 1
+                else:
+                    stats["present"] += 1
+        finally:
+            view.release()
+    return stats
+
+
+class SnapshotScheduler:
+    """Background thread that rewrites the snapshot every `interval` seconds."""
+
+    def __init__(self, store, path: str = SNAPSHOT_PATH, interval: float = 300.0):
+        self.store, self.path, self.interval = store, path, interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SnapshotScheduler":
+        self._thread = threading.Thread(target=self._run, name="astropulse-snapshot", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                save_snapshot(self.store, self.path)
+            except Exception as e:
+                logger.warning(f"[SNAPSHOT] Periodic save failed: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
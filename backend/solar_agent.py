@@ -1,14 +1,19 @@
 # filename: solar_agent.py
-import os, sys, json
-from typing import List, Dict, Any
+import os, json, time
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
-from loguru import logger
+from logging_config import configure_logging, get_logger
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.tools import Tool
 from langchain.memory import ConversationBufferMemory
 from langchain_core.prompts import PromptTemplate
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
 from langchain_openai import ChatOpenAI
 from langchain.callbacks import StdOutCallbackHandler
+from metrics import AGENT_ITERATIONS
+from llm_callbacks import LLMMetricsHandler, StepTimingHandler
+from shared_store import get_store
 from nasa_tools import (
     fetch_nasa_solar_flares,
     analyze_flare_escalation,
@@ -17,50 +22,85 @@ from nasa_tools import (
     generate_operational_alert,
     fetch_nasa_kp_index,  # ✅ NEW TOOL
 )
+from flare_index import query_flares_by_region, max_flare_in_window
 
 
 load_dotenv()
-logger.remove()
-logger.add(sys.stdout, level="INFO", format="<green>[{time:HH:mm:ss}]</green> {message}")
-callback_handler = StdOutCallbackHandler()
+configure_logging()
+logger = get_logger("agent")
+
+# A session's history is dropped after this long without a new message (seconds).
+SESSION_TTL = float(os.getenv("AGENT_SESSION_TTL", "86400"))
+
+
+class StoreChatMessageHistory(BaseChatMessageHistory):
+    """Chat history kept in the shared store, so every worker sees the same session."""
+
+    def __init__(self, session_id: str = "default", max_messages: int = 50, ttl: Optional[float] = SESSION_TTL):
+        self.key = f"session_{session_id}"
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.store = get_store()
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return messages_from_dict([json.loads(m) for m in self.store.range(self.key)])
+
+    def add_message(self, message: BaseMessage) -> None:
+        self.store.append(self.key, json.dumps(message_to_dict(message)), keep=self.max_messages, ttl=self.ttl)
+
+    def clear(self) -> None:
+        self.store.clear_list(self.key)
 
 
 class SolarAnalystAgent:
-    _shared_memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-    def __init__(self, model_name="gemini-2.5-flash", temperature=0.1, verbose=True):
+    @staticmethod
+    def session_memory(session_id: str = None) -> ConversationBufferMemory:
+        """Memory for one chat session. Store-backed, so building it per query is cheap.
+
+        Concurrent queries run in separate threads; keying by session keeps one user's
+        turns out of another's history. Clients that send no id share AGENT_SESSION_ID.
+        """
+        return ConversationBufferMemory(
+            chat_memory=StoreChatMessageHistory(session_id or os.getenv("AGENT_SESSION_ID", "default")),
+            memory_key="chat_history",
+            return_messages=True,
+        )
+
+    def __init__(self, model_name="gemini-2.5-flash", temperature=0.1, verbose=False, llm=None):
         self.verbose = verbose
         logger.info("Initializing Solar Analyst Agent...")
 
-        if not os.getenv("OPENAI_API_KEY"):
-            os.environ["OPENAI_API_KEY"] = os.getenv("GEMINI_API_KEY", "")
-        if not os.getenv("OPENAI_API_BASE"):
-            os.environ["OPENAI_API_BASE"] = "https://generativelanguage.googleapis.com/v1beta/openai/"
-
-        api_key = os.getenv("OPENAI_API_KEY")
-        base_url = os.getenv("OPENAI_API_BASE")
-        if not api_key:
-            raise ValueError("Missing GEMINI_API_KEY in environment variables.")
-
-        self.llm = ChatOpenAI(
-            model=model_name,
-            temperature=temperature,
-            api_key=api_key,
-            base_url=base_url,
-        )
+        if llm is None:
+            if not os.getenv("OPENAI_API_KEY"):
+                os.environ["OPENAI_API_KEY"] = os.getenv("GEMINI_API_KEY", "")
+            if not os.getenv("OPENAI_API_BASE"):
+                os.environ["OPENAI_API_BASE"] = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+            api_key = os.getenv("OPENAI_API_KEY")
+            base_url = os.getenv("OPENAI_API_BASE")
+            if not api_key:
+                raise ValueError("Missing GEMINI_API_KEY in environment variables.")
+
+            llm = ChatOpenAI(
+                model=model_name,
+                temperature=temperature,
+                api_key=api_key,
+                base_url=base_url,
+                stream_usage=True,  # the ReAct executor streams; usage then arrives in the last chunk
+                callbacks=[LLMMetricsHandler(model_name)],
+            )
+        self.llm = llm
 
         self.tools = self._create_tools()
-        self.memory = SolarAnalystAgent._shared_memory
         self.agent = self._create_agent()
 
         self.executor = AgentExecutor(
             agent=self.agent,
             tools=self.tools,
-            memory=self.memory,  
-            verbose=True,
             handle_parsing_errors=True,
             max_iterations=15,
             return_intermediate_steps=True,
-            callbacks=[callback_handler],
         )
 
         logger.success("Solar Analyst Agent ready.")
@@ -78,7 +118,11 @@ class SolarAnalystAgent:
             Tool("CalculateSatelliteVulnerability", calculate_satellite_vulnerability,
                  "Assesses LEO/MEO/GEO satellite risks based on flare strength and Kp index."),
             Tool("GenerateOperationalAlert", generate_operational_alert,
-                 "Generates actionable space-weather alert messages.")
+                 "Generates actionable space-weather alert messages."),
+            Tool("QueryFlaresByRegion", query_flares_by_region,
+                 "Lists all recent flares from one NOAA active region. Input: the region number, e.g. 13664."),
+            Tool("MaxFlareInWindow", max_flare_in_window,
+                 "Finds the strongest flare in the last N hours. Input: number of hours, e.g. 6.")
         ]
 
     def _create_agent(self):
@@ -130,14 +174,22 @@ class SolarAnalystAgent:
         return create_react_agent(self.llm, self.tools, prompt)
 
 
-    def query(self, question: str) -> Dict[str, Any]:
-        """Run the agent on a user query and capture detailed reasoning steps."""
+    def query(self, question: str, verbose: bool = None, session_id: str = None) -> Dict[str, Any]:
+        """Run the agent on a user query and capture detailed reasoning steps.
+
+        `verbose` echoes the chain to stdout for this call only (defaults to the constructor flag).
+        """
         import json
 
         logger.info(f"🤔 Query: {question}")
+        timer = StepTimingHandler()
+        callbacks = [timer]
+        if self.verbose if verbose is None else verbose:
+            callbacks.append(StdOutCallbackHandler())
+        started = time.perf_counter()
         try:
-            # Run the agent chain and capture intermediate steps
-            result = self.executor.invoke({"input": question}, callbacks=[callback_handler])
+            # Run the agent chain and capture intermediate steps (Chain.invoke only reads callbacks from config)
+            result = self.executor.invoke({"input": question}, config={"callbacks": callbacks})
 
             steps = []
             for action, observation in result.get("intermediate_steps", []):
@@ -171,6 +223,7 @@ class SolarAnalystAgent:
                     "action": getattr(action, "tool", ""),
                     "input": parsed_input,
                     "observation": parsed_observation,
+                    "timing": timer.step(len(steps)),
                 })
 
             # Clean final output
@@ -178,11 +231,22 @@ class SolarAnalystAgent:
             if "Invalid Format" in output:
                 output = output.split("Invalid Format")[0].strip()
 
+            # Saved here rather than via AgentExecutor(memory=...) so each query writes to its own session.
+            SolarAnalystAgent.session_memory(session_id).save_context({"input": question}, {"output": output})
+            AGENT_ITERATIONS.observe(len(steps))
             logger.success("✅ Query completed successfully")
+            n = len(steps)
             return {
                 "success": True,
                 "output": output,
                 "intermediate_steps": steps,
+                "timing": {
+                    "total_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "llm_total_ms": round(sum(timer.llm_durations), 2),
+                    "tool_total_ms": round(sum(timer.tool_durations), 2),
+                    "llm_calls": len(timer.llm_durations),
+                    "final_answer_ms": timer.llm_durations[n] if n < len(timer.llm_durations) else None,
+                },
                 "error": None
             }
 
@@ -0,0 +1,42 @@
+# filename: startup.py
+import threading, time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+_T0 = time.perf_counter()
+_phases: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+
+
+@contextmanager
+def phase(name: str):
+    """Time one startup step (an import group, a lazy init) for the /startup report."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _phases.append({
+                "phase": name,
+                "ms": round((time.perf_counter() - start) * 1000, 2),
+                "at_ms": round((start - _T0) * 1000, 2),
+                "thread": threading.current_thread().name,
+            })
+
+
+def report() -> Dict[str, Any]:
+    with _lock:
+        phases = list(_phases)
+    return {
+        "uptime_ms": round((time.perf_counter() - _T0) * 1000, 2),
+        "import_ms": round(sum(p["ms"] for p in phases if p["phase"].startswith("import:")), 2),
+        "init_ms": round(sum(p["ms"] for p in phases if p["phase"].startswith("init:")), 2),
+        "phases": phases,
+    }
+
+
+def summary_line() -> str:
+    r = report()
+    slowest = sorted(r["phases"], key=lambda p: p["ms"], reverse=True)[:4]
+    parts = ", ".join(f"{p['phase']}={p['ms']}ms" for p in slowest)
+    return f"Startup: imports {r['import_ms']}ms, init {r['init_ms']}ms ({parts})"
@@ -0,0 +1,115 @@
+# filename: tests/test_admission.py
+import asyncio
+
+import pytest
+
+import admission
+from admission import AdmissionController, Overloaded
+
+
+async def _hold(gate, priority, started, release):
+    async with gate.slot(priority):
+        started.append(priority)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_admits_up_to_max_concurrent_then_queues():
+    gate = AdmissionController("t", max_concurrent=2, max_queue=4, queue_timeout=5)
+    started, release = [], asyncio.Event()
+    tasks = [asyncio.create_task(_hold(gate, 1, started, release)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert gate.stats()["in_flight"] == 2
+    assert gate.stats()["queue_depth"] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert started == [1, 1, 1]
+    assert gate.stats()["in_flight"] == 0
+    assert gate.admitted == 3
+
+
+@pytest.mark.asyncio
+async def test_short_queries_jump_the_queue():
+    gate = AdmissionController("t", max_concurrent=1, max_queue=4, queue_timeout=5)
+    started, release = [], asyncio.Event()
+    first = asyncio.create_task(_hold(gate, 1, started, release))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(_hold(gate, p, started, release)) for p in (1, 0)]
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(first, *waiters)
+    assert started == [1, 0, 1]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_or_sheds_lower_priority():
+    gate = AdmissionController("t", max_concurrent=1, max_queue=1, queue_timeout=5)
+    release = asyncio.Event()
+    running = asyncio.create_task(_hold(gate, 1, [], release))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(gate.acquire(1))
+    await asyncio.sleep(0)
+
+    with pytest.raises(Overloaded) as exc:
+        await gate.acquire(1)
+    assert (exc.value.status_code, exc.value.reason) == (429, "queue_full")
+
+    outranking = asyncio.create_task(gate.acquire(0))
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded) as exc:
+        await queued
+    assert (exc.value.status_code, exc.value.reason) == (503, "shed")
+
+    release.set()
+    await running
+    await outranking
+    gate.release()
+    assert gate.stats()["in_flight"] == 0
+    assert gate.rejected == {"queue_full": 1, "queue_timeout": 0, "shed": 1}
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_returns_503():
+    gate = AdmissionController("t", max_concurrent=1, max_queue=2, queue_timeout=0.01)
+    await gate.acquire()
+    with pytest.raises(Overloaded) as exc:
+        await gate.acquire()
+    assert (exc.value.status_code, exc.value.reason) == (503, "queue_timeout")
+    assert gate.stats()["queue_depth"] == 0
+    gate.release()
+    assert gate.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_after_grant_hands_slot_on(monkeypatch):
+    """wait_for can raise TimeoutError even though release() already granted the slot."""
+    async def late_wait_for(fut, timeout):
+        await fut
+        raise asyncio.TimeoutError
+
+    gate = AdmissionController("t", max_concurrent=1, max_queue=2, queue_timeout=5)
+    await gate.acquire()
+    monkeypatch.setattr(admission.asyncio, "wait_for", late_wait_for)
+    waiter = asyncio.create_task(gate.acquire())
+    await asyncio.sleep(0)
+
+    gate.release()  # grants the slot to the waiter
+    with pytest.raises(Overloaded):
+        await waiter
+    assert gate.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    gate = AdmissionController("t", max_concurrent=1, max_queue=2, queue_timeout=5)
+    await gate.acquire()
+    waiter = asyncio.create_task(gate.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert gate.stats()["queue_depth"] == 0
+    gate.release()
+    assert gate.stats()["in_flight"] == 0
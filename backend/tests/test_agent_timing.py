@@ -0,0 +1,35 @@
+# filename: tests/test_agent_timing.py
+from langchain_core.language_models import FakeListChatModel
+
+from solar_agent import SolarAnalystAgent
+
+SCRIPT = [
+    'Thought: I should call PredictMagnetosphereImpact.\nAction: PredictMagnetosphereImpact\n'
+    'Action Input: {"flare_class": "X2.1", "source_location": "N10W30"}',
+    'Thought: I should call CalculateSatelliteVulnerability.\nAction: CalculateSatelliteVulnerability\n'
+    'Action Input: {"flare_class": "X2.1", "kp_index": 7}',
+    "Thought: I now know the final answer.\nFinal Answer: Strong flare, elevated satellite risk.",
+]
+
+
+def test_traced_run_has_per_step_timings():
+    agent = SolarAnalystAgent(llm=FakeListChatModel(responses=SCRIPT))
+    result = agent.query("How exposed are satellites to an X2.1 flare?", session_id="test-timing")
+
+    assert result["success"], result["error"]
+    steps = result["intermediate_steps"]
+    assert [s["action"] for s in steps] == ["PredictMagnetosphereImpact", "CalculateSatelliteVulnerability"]
+    for step in steps:
+        assert step["timing"]["llm_ms"] is not None
+        assert step["timing"]["tool_ms"] is not None
+    assert result["timing"]["llm_calls"] == 3
+    assert result["timing"]["final_answer_ms"] is not None
+
+
+def test_verbose_echoes_chain_only_when_requested(capsys):
+    agent = SolarAnalystAgent(llm=FakeListChatModel(responses=SCRIPT[-1:] * 2))
+    agent.query("hi", session_id="test-verbose")
+    assert "Entering new AgentExecutor chain" not in capsys.readouterr().out
+
+    agent.query("hi", verbose=True, session_id="test-verbose")
+    assert "Entering new AgentExecutor chain" in capsys.readouterr().out
@@ -0,0 +1,136 @@
+# filename: tests/test_flare_index.py
+import json, random
+from datetime import datetime, timedelta
+
+import pytest
+
+from flare_index import FlareIndex, open_bounds
+from nasa_tools import flare_intensity
+
+
+def _flares(n, start=datetime(2024, 1, 1), seed=7):
+    rnd = random.Random(seed)
+    t, out = start, []
+    for i in range(n):
+        t += timedelta(minutes=rnd.randint(5, 300))
+        out.append({
+            "flareID": f"{t:%Y-%m-%dT%H:%M}-FLR-{seed}-{i}",
+            "peakTime": t.strftime("%Y-%m-%dT%H:%MZ"),
+            "classType": f"{rnd.choice('CMX')}{rnd.uniform(1, 9.9):.1f}",
+            "activeRegionNum": rnd.randint(13600, 13610),
+        })
+    return out
+
+
+def _brute_max(index, lo_ts, hi_ts):
+    records = index.window(lo_ts, hi_ts)
+    return max((flare_intensity(r.class_type) for r in records), default=None)
+
+
+@pytest.mark.parametrize("batches", [[500], [300, 1, 1, 40, 7], [1] * 20])
+def test_max_in_window_matches_brute_force_after_appends(batches):
+    flares = _flares(sum(batches))
+    index, pos = FlareIndex(), 0
+    for size in batches:
+        index.add_many(flares[pos:pos + size])
+        pos += size
+
+    rnd = random.Random(1)
+    times = [r.peak_ts for r in index.window(float("-inf"), float("inf"))]
+    for _ in range(200):
+        a, b = sorted(rnd.sample(times, 2))
+        record = index.max_in_window(a, b)
+        assert record.intensity == _brute_max(index, a, b)
+
+
+def test_out_of_order_insert_rebuilds_table():
+    flares = _flares(200)
+    index = FlareIndex()
+    index.add_many(flares[100:])
+    index.add_many(flares[:100])
+    assert len(index) == 200
+    whole = index.max_in_window(float("-inf"), float("inf"))
+    assert whole.intensity == _brute_max(index, float("-inf"), float("inf"))
+
+
+def test_open_bounds():
+    assert open_bounds() == (float("-inf"), float("inf"))
+    lo, hi = open_bounds(end="2024-05-10T06:00Z")
+    assert lo == float("-inf") and hi < float("inf")
+    with pytest.raises(ValueError):
+        open_bounds(start="garbage")
+
+
+def test_ensure_recent_from_many_threads(monkeypatch):
+    import sys, threading
+    import flare_index
+
+    payload = json.dumps(_flares(50))
+    fetched = []
+
+    def fake_fetch(days_back):
+        fetched.append(days_back)
+        return payload
+
+    monkeypatch.setattr(flare_index, "fetch_nasa_solar_flares", fake_fetch)
+    errors = []
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for _ in range(100):
+            index, fetched[:] = FlareIndex(), []
+            barrier = threading.Barrier(8)
+
+            def worker(seed):
+                days = list(range(1, 31))
+                random.Random(seed).shuffle(days)
+                barrier.wait()
+                try:
+                    for d in days:
+                        index.ensure_recent(d)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=worker, args=(d,)) for d in range(1, 9)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert len(index) == 50
+            assert len(fetched) == len(set(fetched))  # each window fetched at most once per interval
+    finally:
+        sys.setswitchinterval(interval)
+    assert not errors
+
+
+def test_backfill_rejects_inverted_and_oversized_ranges(monkeypatch):
+    import flare_index
+
+    monkeypatch.setattr(flare_index, "download_flares", lambda start, end: pytest.fail("no fetch expected"))
+    index = FlareIndex()
+    with pytest.raises(ValueError):
+        index.backfill(datetime(2024, 5, 1), datetime(2024, 4, 1))
+    with pytest.raises(ValueError):
+        index.backfill(datetime(1990, 1, 1), datetime(2024, 1, 1))
+    assert index.covered_since is None
+
+
+def test_backfill_coverage_stops_at_failed_chunk(monkeypatch):
+    import flare_index
+
+    requested = []
+
+    def fake_download(start, end):
+        requested.append((start, end))
+        if start < "2024-03-01":
+            raise RuntimeError("DONKI unavailable")
+        return json.dumps(_flares(5, start=datetime.strptime(start, "%Y-%m-%d"), seed=len(requested)))
+
+    monkeypatch.setattr(flare_index, "download_flares", fake_download)
+    index = FlareIndex()
+    with pytest.raises(RuntimeError):
+        index.backfill(datetime(2024, 1, 1), datetime(2024, 5, 31))
+    assert requested[0][1] == "2024-05-31"  # newest chunk first
+    assert len(index) == 5 * (len(requested) - 1)
+    loaded_from = datetime.utcfromtimestamp(index.covered_since)
+    assert loaded_from == datetime.strptime(requested[-2][0], "%Y-%m-%d")
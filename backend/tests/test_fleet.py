@@ -0,0 +1,44 @@
+# filename: tests/test_fleet.py
+import random
+
+import pytest
+
+from fleet import score_fleet
+from nasa_tools import vulnerability_severity
+
+
+def _catalog(n=300, seed=3):
+    rnd = random.Random(seed)
+    alts = ((300, 2000), (2000, 30000), (35700, 35900))
+    return [{"id": f"SAT-{i:04d}", "altitude_km": rnd.uniform(*rnd.choice(alts)),
+             "inclination_deg": rnd.uniform(0, 98), "shielding": rnd.choice(("light", "standard", "hardened"))}
+            for i in range(n)]
+
+
+@pytest.mark.parametrize("flare_class,kp", [("C2.0", 1), ("M5.2", 6), ("X3.9", 8)])
+def test_ranking_and_totals(flare_class, kp):
+    satellites = _catalog()
+    report = score_fleet(satellites, flare_class, kp, top=None)
+
+    assert report["conditions"]["overall_severity"] == vulnerability_severity(flare_class, kp)
+    assert report["count"] == len(satellites) == len(report["results"])
+    assert sum(report["risk_counts"].values()) == report["count"]
+    scores = [r["score"] for r in report["results"]]
+    assert scores == sorted(scores, reverse=True)
+    assert [r["rank"] for r in report["results"]] == list(range(1, len(satellites) + 1))
+    assert {r["id"] for r in report["results"]} == {s["id"] for s in satellites}
+
+
+def test_top_and_shielding():
+    base = {"altitude_km": 550.0, "inclination_deg": 97.0}
+    satellites = [dict(base, id="hardened", shielding="hardened"), dict(base, id="light", shielding="light"),
+                  dict(base, id="standard", shielding="standard")]
+    report = score_fleet(satellites, "M5.2", 6, top=2)
+    assert [r["id"] for r in report["results"]] == ["light", "standard"]
+    assert report["results"][0]["regime"] == "LEO"
+    assert sum(report["risk_counts"].values()) == 3
+
+
+def test_empty_fleet():
+    report = score_fleet([], "M1.0", 3)
+    assert report["count"] == 0 and report["results"] == [] and report["mean_score"] == 0.0
@@ -0,0 +1,17 @@
+# filename: tests/test_llm_callbacks.py
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from llm_callbacks import _token_usage
+
+
+def test_token_usage_from_llm_output():
+    result = LLMResult(generations=[[ChatGeneration(message=AIMessage(content="hi"))]],
+                       llm_output={"token_usage": {"prompt_tokens": 12, "completion_tokens": 3}})
+    assert _token_usage(result) == (12, 3)
+
+
+def test_token_usage_from_streamed_usage_metadata():
+    message = AIMessage(content="hi", usage_metadata={"input_tokens": 40, "output_tokens": 7, "total_tokens": 47})
+    result = LLMResult(generations=[[ChatGeneration(message=message)]], llm_output=None)
+    assert _token_usage(result) == (40, 7)
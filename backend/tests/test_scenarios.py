@@ -0,0 +1,47 @@
+# filename: tests/test_scenarios.py
+import base64
+
+import numpy as np
+import pytest
+
+from nasa_tools import cme_estimate, vulnerability_severity
+from scenarios import KP_VALUES, MAGNITUDES, SEVERITY_CODES, heatmap
+
+
+@pytest.mark.parametrize("flare_class", ["C", "M", "X"])
+def test_severity_slice_matches_rules(flare_class):
+    result = heatmap("severity", x="kp", y="magnitude", fixed={"flare_class": flare_class})
+    assert result["shape"] == [len(MAGNITUDES), len(KP_VALUES)]
+    for mi in (0, 9, 40, 88):
+        for kp in (0, 4, 5, 7, 9):
+            m = MAGNITUDES[mi].item()
+            expected = vulnerability_severity(f"{flare_class}{m}", kp)
+            assert result["legend"][str(result["values"][mi][kp])] == expected
+
+
+def test_cme_slices_match_estimate():
+    arrival = heatmap("arrival_hours", x="magnitude", y="flare_class")
+    kp = heatmap("kp_estimate", x="magnitude", y="flare_class")
+    for ci, c in enumerate(arrival["y"]["labels"]):
+        for mi in (0, 30, 60, 88):
+            likely, hrs, kp_est = cme_estimate(c, MAGNITUDES[mi].item())
+            assert arrival["values"][ci][mi] == (hrs if likely else -1)
+            assert kp["values"][ci][mi] == (kp_est if likely else 0)
+
+
+def test_axis_order_and_b64():
+    rows = heatmap("combined_risk", x="kp", y="longitude")
+    cols = heatmap("combined_risk", x="longitude", y="kp")
+    assert np.array_equal(np.array(rows["values"]), np.array(cols["values"]).T)
+
+    packed = heatmap("combined_risk", x="kp", y="longitude", encoding="b64")
+    values = np.frombuffer(base64.b64decode(packed["values"]), dtype=packed["dtype"]).reshape(packed["shape"])
+    assert values.tolist() == rows["values"]
+    assert set(values.ravel().tolist()) <= set(SEVERITY_CODES.values())
+
+
+@pytest.mark.parametrize("metric,x,y", [("severity", "kp", "kp"), ("flux", "kp", "magnitude"),
+                                        ("severity", "kp", "latitude")])
+def test_bad_requests_raise(metric, x, y):
+    with pytest.raises(ValueError):
+        heatmap(metric, x, y)
@@ -0,0 +1,138 @@
+# filename: tests/test_shared_store.py
+import threading, time
+
+import pytest
+
+from shared_store import MemoryStore, SQLiteStore, fetch_once
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStore()
+    return SQLiteStore(str(tmp_path / "store.db"))
+
+
+def test_list_expires_when_idle(store):
+    store.append("session_a", "1", keep=50, ttl=0.5)
+    store.append("session_b", "1", keep=50)
+    time.sleep(0.25)
+    store.append("session_a", "2", keep=50, ttl=0.5)  # refreshes the expiry
+    time.sleep(0.35)
+    assert store.range("session_a") == ["1", "2"]
+    time.sleep(0.25)
+    assert store.range("session_a") == []
+    assert store.range("session_b") == ["1"]
+
+    store.append("session_a", "3", keep=50, ttl=0.2)  # an expired list starts over
+    assert store.range("session_a") == ["3"]
+
+
+def test_expired_lists_are_purged(store):
+    store.PURGE_EVERY = 10
+    for i in range(9):
+        store.append(f"session_{i}", "x", ttl=0.05)
+    time.sleep(0.1)
+    store.append("session_live", "x", ttl=60)
+    if isinstance(store, MemoryStore):
+        assert list(store._lists) == ["session_live"]
+    else:
+        keys = {r[0] for r in store._conn().execute("SELECT key FROM lists")}
+        assert keys == {"session_live"}
+
+
+def test_ttl_expiry(store):
+    store.set("flares_a", "1", ttl=0.05)
+    store.set("kp_b", "2")
+    assert store.get("flares_a") == "1"
+    time.sleep(0.1)
+    assert store.get("flares_a") is None
+    assert store.get("kp_b") == "2"
+    store.delete("kp_b")
+    assert store.get("kp_b") is None
+
+
+def test_add_is_a_lease(store):
+    assert store.add("lease:k", "1", ttl=0.05)
+    assert not store.add("lease:k", "2", ttl=0.05)
+    assert store.get("lease:k") == "1"
+    time.sleep(0.1)
+    assert store.add("lease:k", "3", ttl=0.05)  # an expired lease can be taken again
+    store.delete("lease:k")
+    assert store.add("lease:k", "4")
+
+
+def test_append_keeps_newest(store):
+    for i in range(5):
+        store.append("session_x", str(i), keep=3)
+    assert store.range("session_x") == ["2", "3", "4"]
+    assert store.range("session_missing") == []
+    store.clear_list("session_x")
+    assert store.range("session_x") == []
+
+
+def test_scan_by_prefix(store):
+    store.set("flares_1", "a", ttl=60)
+    store.set("flares_2", "b")
+    store.set("flares_old", "c", ttl=0.05)
+    store.set("kp_1", "d")
+    time.sleep(0.1)
+    rows = {key: (value, expires) for key, value, _, expires in store.scan("flares_")}
+    assert set(rows) == {"flares_1", "flares_2"}
+    assert rows["flares_2"] == ("b", None)
+    assert rows["flares_1"][1] > time.time()
+    assert len(list(store.scan())) == 3
+
+
+def test_fetch_once_single_flight(store):
+    calls = []
+    started = threading.Event()
+
+    def loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "payload"
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(fetch_once(store, "flares_k", loader, ttl=60)))
+    owner.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=lambda: results.append(fetch_once(store, "flares_k", loader, ttl=60)))
+               for _ in range(4)]
+    for t in waiters:
+        t.start()
+    for t in [owner, *waiters]:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [("payload", False)] + [("payload", True)] * 4
+    assert store.get("lease:flares_k") is None
+
+
+def test_fetch_once_after_owner_failure(store):
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    errors = []
+
+    def owner():
+        try:
+            fetch_once(store, "kp_k", failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=owner)
+    t.start()
+    started.wait(5)
+    # The waiter notices the lease is gone and fetches itself instead of waiting out wait_s.
+    begun = time.monotonic()
+    assert fetch_once(store, "kp_k", lambda: "fallback", wait_s=5) == ("fallback", False)
+    assert time.monotonic() - begun < 2
+    t.join()
+    assert len(errors) == 1
+    assert store.get("kp_k") == "fallback"
@@ -0,0 +1,82 @@
+# filename: tests/test_snapshot.py
+import math, time
+
+import pytest
+
+from shared_store import MemoryStore
+from snapshot import MAGIC, _ENTRY, _HEADER, load_snapshot, save_snapshot
+
+
+def _saved(tmp_path):
+    store = MemoryStore()
+    store.set("flares_2024-05-03_2024-05-10", '[{"classType": "X3.9"}]' * 50, ttl=600)
+    store.set("kp_2024-05-10", "5.33")
+    store.set("session_abc", "not snapshotted")
+    path = str(tmp_path / "cache.snap")
+    return store, path, save_snapshot(store, path)
+
+
+def test_header_and_index_layout(tmp_path):
+    _, path, saved = _saved(tmp_path)
+    assert saved["entries"] == 2
+
+    data = open(path, "rb").read()
+    magic, count, written_at = _HEADER.unpack_from(data, 0)
+    assert (magic, count) == (MAGIC, 2) and abs(written_at - time.time()) < 60
+
+    pos, entries = _HEADER.size, {}
+    for _ in range(count):
+        key_len, offset, length, created, expires = _ENTRY.unpack_from(data, pos)
+        pos += _ENTRY.size
+        entries[data[pos:pos + key_len].decode()] = (offset, length, expires)
+        pos += key_len
+    assert set(entries) == {"flares_2024-05-03_2024-05-10", "kp_2024-05-10"}
+    assert math.isnan(entries["kp_2024-05-10"][2])  # no expiry
+    assert entries["flares_2024-05-03_2024-05-10"][2] > time.time()
+    # Values follow the index back to back, and the file ends with the last one.
+    blobs = sorted(entries.values())
+    assert blobs[0][0] == pos
+    assert blobs[0][0] + blobs[0][1] == blobs[1][0]
+    assert blobs[1][0] + blobs[1][1] == len(data) == saved["bytes"]
+
+
+def test_round_trip(tmp_path):
+    source, path, _ = _saved(tmp_path)
+    target = MemoryStore()
+    assert load_snapshot(target, path) == {"loaded": 2, "stale": 0, "present": 0}
+
+    for key in ("flares_2024-05-03_2024-05-10", "kp_2024-05-10"):
+        assert target.get(key) == source.get(key)
+    assert target.get("session_abc") is None
+    expires = {k: e for k, _, _, e in target.scan()}
+    assert expires["kp_2024-05-10"] is None
+    assert 590 < expires["flares_2024-05-03_2024-05-10"] - time.time() <= 600
+
+
+def test_expired_and_old_entries_are_skipped(tmp_path):
+    store = MemoryStore()
+    store.set("flares_short", "[]", ttl=0.05)
+    store.set("kp_forever", "4.0")
+    path = str(tmp_path / "cache.snap")
+    save_snapshot(store, path)
+    time.sleep(0.1)
+
+    assert load_snapshot(MemoryStore(), path) == {"loaded": 1, "stale": 1, "present": 0}
+    # max_age drops entries without a TTL too once they are old enough.
+    assert load_snapshot(MemoryStore(), path, max_age=0.05) == {"loaded": 0, "stale": 2, "present": 0}
+
+
+def test_load_keeps_fresher_entries(tmp_path):
+    _, path, _ = _saved(tmp_path)
+    target = MemoryStore()
+    target.set("kp_2024-05-10", "6.0")
+    assert load_snapshot(target, path) == {"loaded": 1, "stale": 0, "present": 1}
+    assert target.get("kp_2024-05-10") == "6.0"
+
+
+def test_missing_and_foreign_files(tmp_path):
+    assert load_snapshot(MemoryStore(), str(tmp_path / "missing.snap")) == {"loaded": 0, "stale": 0, "present": 0}
+    path = tmp_path / "other.snap"
+    path.write_bytes(_HEADER.pack(b"NOTSNAP1", 0, time.time()))
+    with pytest.raises(ValueError):
+        load_snapshot(MemoryStore(), str(path))